@@ -0,0 +1,241 @@
+"""
+离线批量求解棋盘
+从文件或标准输入流式读取棋盘（JSONL / NumPy .npy），逐行输出 JSONL 结果，
+不依赖游戏窗口，可用于大规模回放评分与不同引擎版本的对比。
+
+用法示例:
+    python batch_solve.py boards.jsonl -o results.jsonl --workers 8
+    python batch_solve.py boards.npy --simulations 3
+    cat boards.jsonl | python batch_solve.py - > results.jsonl
+"""
+import argparse
+import json
+import math
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, NamedTuple
+
+import numpy as np
+
+import eliminate
+
+BOARD_SHAPE = (8, 8)
+
+
+class InvalidBoard(NamedTuple):
+    """无法解析的输入行，占据原本棋盘的位置，求解时输出为错误记录"""
+    line: int  # 输入中的行号（从 1 开始）
+    error: str
+
+
+# ------------------- 1. 求解后端 -------------------
+def _solve_exhaustive(matrix: np.ndarray, simulations: int, prune: int | None = None, weights: np.ndarray | None = None) -> dict:
+    """穷举全部相邻交换，每个移动模拟 simulations 次（即 eliminate.find_best_move，可用静态评估剪枝）"""
+    best_move, best_elim, best_chain, total_moves = eliminate.find_best_move(matrix, simulations, prune, weights)
+    return {
+        'move': [list(best_move[0]), list(best_move[1])] if best_chain > 0 else None,
+        'elim': int(best_elim),
+        'chain': int(best_chain),
+        'total_moves': int(total_moves),
+    }
+
+
+def _solve_crn(matrix: np.ndarray, simulations: int) -> dict:
+    """公共随机数模拟，simulations 为最多模拟轮数（至少 2 轮），领先移动统计上分出胜负后提前停止"""
+    stats, used = eliminate.evaluate_moves_crn(matrix, max_simulations=simulations, min_simulations=min(8, simulations))
+    if not stats:
+        return {'move': None, 'elim': 0, 'chain': 0, 'total_moves': 0, 'simulations': used}
+    best = stats[0]
+    return {
+        'move': [list(best['move'][0]), list(best['move'][1])],
+        'elim': best['elim'],
+        'chain': best['chain'],
+        'score': best['score'],
+        'ci': best['ci'] if math.isfinite(best['ci']) else None,  # JSON 不支持 Infinity / NaN
+        'total_moves': len(stats),
+        'simulations': used,
+    }
+
+
+BACKENDS = {
+    'exhaustive': _solve_exhaustive,
+    'crn': _solve_crn,
+}
+
+
+def _solve_batch(backend: str, simulations: int, batch: list[tuple[int, object, np.ndarray]], options: dict) -> list[dict]:
+    """在工作进程中求解一批棋盘，保持输入顺序；options 为后端的额外参数"""
+    solve = BACKENDS[backend]
+    results = []
+    for index, board_id, matrix in batch:
+        result = {'index': index}
+        if board_id is not None:
+            result['id'] = board_id
+        if isinstance(matrix, InvalidBoard):
+            result.update({'line': matrix.line, 'error': matrix.error})
+        else:
+            result.update(solve(matrix, simulations, **options))
+        results.append(result)
+    return results
+
+
+# ------------------- 2. 流式读取 -------------------
+def _to_board(data) -> np.ndarray:
+    """把一行数据转换为 8×8 int 矩阵，形状不对时抛出 ValueError"""
+    matrix = np.asarray(data, dtype=int)
+    if matrix.shape != BOARD_SHAPE:
+        raise ValueError(f"棋盘形状应为 {BOARD_SHAPE}，实际为 {matrix.shape}")
+    return matrix
+
+
+def iter_jsonl(stream) -> Iterator[tuple[object, np.ndarray | InvalidBoard]]:
+    """
+    逐行读取 JSONL，每行为 8×8 数组，或形如 {"id": ..., "board": [[...]]} 的对象。
+    无法解析或形状不对的行产生 InvalidBoard，输出为带行号的错误记录，不中断后续棋盘的求解。
+    """
+    for line_no, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        board_id = None
+        try:
+            record = json.loads(line)
+            if isinstance(record, dict):
+                board_id = record.get('id')
+                yield board_id, _to_board(record['board'])
+            else:
+                yield None, _to_board(record)
+        except (ValueError, KeyError, TypeError) as e:  # json.JSONDecodeError 是 ValueError 的子类
+            yield board_id, InvalidBoard(line_no, f"{type(e).__name__}: {e}")
+
+
+def iter_npy(stream) -> Iterator[tuple[object, np.ndarray]]:
+    """
+    逐个读取 .npy 中的棋盘，只解析头部，随后每次只读入一个棋盘的字节，
+    因此对标准输入同样有效。数组形状为 (N, 8, 8) 或 (8, 8)，需为 C 顺序。
+    """
+    version = np.lib.format.read_magic(stream)
+    if version == (1, 0):
+        shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(stream)
+    else:
+        shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(stream)
+    if fortran_order:
+        raise ValueError("不支持 Fortran 顺序的 .npy 文件")
+    if shape == BOARD_SHAPE:
+        shape = (1,) + BOARD_SHAPE
+    if len(shape) != 3 or shape[1:] != BOARD_SHAPE:
+        raise ValueError(f"数组形状应为 (N, 8, 8)，实际为 {shape}")
+    size = dtype.itemsize * 64
+    for _ in range(shape[0]):
+        buf = stream.read(size)
+        if len(buf) < size:
+            raise ValueError(".npy 文件被截断")
+        yield None, np.frombuffer(buf, dtype=dtype).reshape(BOARD_SHAPE).astype(int)
+
+
+def _detect_format(path: str, fmt: str) -> str:
+    if fmt != 'auto':
+        return fmt
+    return 'npy' if path.lower().endswith('.npy') else 'jsonl'
+
+
+def _batched(boards: Iterator[tuple[object, np.ndarray]], size: int) -> Iterator[list]:
+    batch = []
+    for index, (board_id, matrix) in enumerate(boards):
+        batch.append((index, board_id, matrix))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ------------------- 3. 流式求解 -------------------
+def solve_stream(boards: Iterator[tuple[object, np.ndarray]], out, backend: str = 'exhaustive',
+                 simulations: int = 1, workers: int = 1, batch_size: int = 64, **options) -> int:
+    """
+    流式求解棋盘并逐行写出 JSONL 结果，输出顺序与输入一致。
+
+    参数:
+        boards: (id, 8×8 矩阵) 迭代器
+        out: 文本输出流
+        backend: BACKENDS 中的求解后端名称
+        simulations: 每个移动的模拟次数
+        workers: 工作进程数，1 表示在当前进程内求解
+        batch_size: 每个任务包含的棋盘数量
+        options: 传给求解后端的额外参数（exhaustive 的 prune / weights）
+    返回:
+        已求解的棋盘数量（不含错误记录）
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"未知求解后端: {backend}")
+    count = 0
+
+    def write(results):
+        nonlocal count
+        for result in results:
+            out.write(json.dumps(result, ensure_ascii=False, allow_nan=False) + '\n')
+            if 'error' in result:
+                print(f"第 {result['line']} 行无效: {result['error']}", file=sys.stderr)
+            else:
+                count += 1
+
+    if workers <= 1:
+        for batch in _batched(boards, batch_size):
+            write(_solve_batch(backend, simulations, batch, options))
+        return count
+
+    # 限制在途任务数量，避免把整个输入读进内存
+    max_pending = workers * 4
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for batch in _batched(boards, batch_size):
+            pending.append(pool.submit(_solve_batch, backend, simulations, batch, options))
+            if len(pending) >= max_pending:
+                write(pending.popleft().result())
+        while pending:
+            write(pending.popleft().result())
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线批量求解三消棋盘，输出 JSONL")
+    parser.add_argument('input', nargs='?', default='-', help="输入文件（.jsonl / .npy），- 表示标准输入")
+    parser.add_argument('-o', '--output', default='-', help="输出 JSONL 文件，- 表示标准输出")
+    parser.add_argument('--format', choices=('auto', 'jsonl', 'npy'), default='auto', help="输入格式，默认按扩展名判断")
+    parser.add_argument('--backend', choices=sorted(BACKENDS), default='exhaustive', help="求解后端")
+    parser.add_argument('--simulations', type=int, default=1, help="每个移动的模拟次数")
+    parser.add_argument('--workers', type=int, default=1, help="工作进程数")
+    parser.add_argument('--batch-size', type=int, default=64, help="每个任务的棋盘数量")
+    parser.add_argument('--prune', type=int, default=None, help="exhaustive 只完整模拟静态评估前 N 个移动")
+    parser.add_argument('--weights', help="剪枝使用的静态评估权重 .npy（evaluator.py --out），默认 evaluator.DEFAULT_WEIGHTS")
+    args = parser.parse_args(argv)
+    options = {}
+    if args.prune is not None or args.weights:
+        if args.backend != 'exhaustive' or args.prune is None:
+            parser.error("--prune / --weights 只用于 exhaustive 后端，--weights 需要同时指定 --prune")
+        options['prune'] = args.prune
+        if args.weights:
+            import evaluator  # 只有剪枝时才需要
+            options['weights'] = evaluator.load_weights(args.weights)
+
+    fmt = _detect_format(args.input, args.format)
+    if args.input == '-':
+        src = sys.stdin.buffer if fmt == 'npy' else sys.stdin
+    else:
+        src = open(args.input, 'rb' if fmt == 'npy' else 'r', encoding=None if fmt == 'npy' else 'utf-8')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        boards = iter_npy(src) if fmt == 'npy' else iter_jsonl(src)
+        count = solve_stream(boards, out, args.backend, args.simulations, args.workers, args.batch_size, **options)
+    finally:
+        if src not in (sys.stdin, sys.stdin.buffer):
+            src.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"已求解 {count} 个棋盘", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
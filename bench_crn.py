@@ -0,0 +1,73 @@
+"""
+求解器决策质量基准
+比较两种求解方式在相同决策质量下的模拟开销：
+    - independent: eliminate.find_best_move，每个移动独立模拟 simulations 次（实时求解的默认方式）
+    - crn: eliminate.find_best_move_crn，所有移动共用同一组新方块，领先移动统计上胜出后提前停止
+参考答案用向量化模拟器对每个有效移动做 --reference 次随机补充的完整结算，取平均得分最高的移动。
+对每种设置报告：与参考最佳移动一致的比例、平均损失（参考最佳移动与所选移动的参考平均得分之差）、
+每个棋盘的平均模拟轮数与耗时。
+
+用法示例:
+    python bench_crn.py --boards 30 --reference 1000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import eliminate
+import simulator
+
+
+def reference_scores(matrix: np.ndarray, rollouts: int, rng: np.random.Generator) -> np.ndarray:
+    """返回 (112,) 每个移动的参考平均得分，不产生消除的移动为 -inf"""
+    valid = simulator.valid_moves(matrix[None].astype(np.int8))[0]
+    scores = np.full(len(simulator.MOVES), -np.inf)
+    idx = np.flatnonzero(valid)
+    boards = np.repeat(matrix[None].astype(np.int8), len(idx) * rollouts, axis=0)
+    moves = np.repeat(idx, rollouts)
+    simulator.swap(boards, moves)
+    elim, chains = simulator.resolve(boards, rng)
+    scores[idx] = (elim + chains * 10).reshape(len(idx), rollouts).mean(axis=1)
+    return scores
+
+
+def run(name: str, solve, boards: list, refs: list) -> None:
+    agree, regret, sims = 0, [], []
+    start = time.perf_counter()
+    for matrix, ref in zip(boards, refs):
+        move, used = solve(matrix)
+        chosen = ref[simulator.MOVE_INDEX[move]] if move in simulator.MOVE_INDEX else -np.inf
+        agree += chosen == ref.max()
+        regret.append(ref.max() - chosen)
+        sims.append(used)
+    elapsed = (time.perf_counter() - start) / len(boards)
+    print(f"{name:<20} 一致 {agree / len(boards):6.1%}  平均损失 {np.mean(regret):6.2f}"
+          f"  模拟轮数 {np.mean(sims):6.1f}  每盘 {elapsed * 1000:7.1f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="独立模拟与公共随机数（CRN）求解的决策质量对比")
+    parser.add_argument('--boards', type=int, default=30, help="测试棋盘数")
+    parser.add_argument('--reference', type=int, default=1000, help="参考答案每个移动的模拟次数")
+    parser.add_argument('--independent', type=int, nargs='+', default=[1, 2, 4, 8], help="independent 的 simulations 取值")
+    parser.add_argument('--crn', type=int, nargs='+', default=[4, 8, 16, 32], help="crn 的最多模拟轮数取值")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    boards = [b.astype(int) for b in simulator.random_boards(args.boards, rng)]
+    refs = [reference_scores(b, args.reference, rng) for b in boards]
+    print(f"棋盘 {args.boards} 个  参考模拟 {args.reference} 次/移动")
+
+    for k in args.independent:
+        run(f"independent k={k}", lambda m, k=k: (eliminate.find_best_move(m, k)[0], k), boards, refs)
+    for k in args.crn:
+        def solve(m, k=k):
+            stats, used = eliminate.evaluate_moves_crn(m, max_simulations=k, min_simulations=min(8, k))
+            return (stats[0]['move'] if stats else None), used
+        run(f"crn max={k}", solve, boards, refs)
+
+
+if __name__ == "__main__":
+    main()
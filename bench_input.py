@@ -0,0 +1,61 @@
+"""
+点击阶段时序基准
+用 RecordingBackend 模拟后端调用耗时，对比两种方式执行一批交换的实际间隔与吞吐：
+    - fixed: 原先的写法，点击后固定 time.sleep，调用耗时叠加在间隔之外
+    - scheduled: ClickTiming 按截止时间调度，调用耗时计入间隔
+
+用法示例:
+    python bench_input.py --swaps 50 --latency 0.01
+"""
+import argparse
+import statistics
+import time
+
+from input_backend import ClickTiming, RecordingBackend
+
+
+def run_fixed(backend: RecordingBackend, swaps: int, click_gap: float, move_gap: float) -> None:
+    for k in range(swaps):
+        backend.click(k, 0)
+        time.sleep(click_gap)
+        backend.click(k, 1)
+        time.sleep(move_gap)
+
+
+def run_scheduled(backend: RecordingBackend, swaps: int) -> None:
+    for k in range(swaps):
+        backend.swap((k, 0), (k, 1))
+
+
+def report(name: str, backend: RecordingBackend, elapsed: float, swaps: int, click_gap: float) -> None:
+    clicks = backend.clicks()
+    gaps = [(clicks[i + 1][0] - clicks[i][0]) * 1000 for i in range(0, len(clicks) - 1, 2)]
+    errors = [g - click_gap * 1000 for g in gaps]
+    print(f"{name:<10} 交换/秒 {swaps / elapsed:>6.1f}   点击间隔 平均 {statistics.mean(gaps):6.2f}ms"
+          f"  误差 平均 {statistics.mean(errors):+6.2f}ms  最大 {max(errors, key=abs):+6.2f}ms")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="点击阶段时序基准")
+    parser.add_argument('--swaps', type=int, default=50, help="交换次数")
+    parser.add_argument('--latency', type=float, default=0.01, help="模拟每次点击调用的耗时（秒）")
+    parser.add_argument('--click-gap', type=float, default=0.05, help="两次点击的目标间隔（秒）")
+    parser.add_argument('--move-gap', type=float, default=0.05, help="两次交换的目标间隔（秒）")
+    args = parser.parse_args(argv)
+
+    timing = ClickTiming(args.click_gap, args.move_gap)
+    print(f"time.sleep 超时误差（校准值）: {timing.oversleep * 1000:.2f}ms  模拟调用耗时: {args.latency * 1000:.1f}ms")
+
+    backend = RecordingBackend(timing, args.latency)
+    start = time.perf_counter()
+    run_fixed(backend, args.swaps, args.click_gap, args.move_gap)
+    report('fixed', backend, time.perf_counter() - start, args.swaps, args.click_gap)
+
+    backend = RecordingBackend(timing, args.latency)
+    start = time.perf_counter()
+    run_scheduled(backend, args.swaps)
+    report('scheduled', backend, time.perf_counter() - start, args.swaps, args.click_gap)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+静态评估剪枝基准
+比较 eliminate.find_best_move 在默认模拟次数下完整搜索与 prune=N 剪枝的每盘耗时与决策一致率，
+并检查静态评估（rank_moves_static）的排序质量：参考最佳移动落在静态排序前 k 个之内的比例（top-k 召回率）。
+参考最佳移动与 bench_crn.py 相同，用向量化模拟器对每个有效移动做 --reference 次结算取平均得分最高者。
+指定 --weights 时剪枝使用该权重，并同时报告 evaluator.py 拟合权重与默认权重的召回率，用于判断拟合权重是否值得使用。
+
+用法示例:
+    python bench_prune.py --boards 200 --prune 4 8
+    python bench_prune.py --weights weights.npy
+"""
+import argparse
+import time
+
+import numpy as np
+
+import bench_crn
+import eliminate
+import evaluator
+import simulator
+
+
+def recall(boards: list, refs: list, weights: np.ndarray | None, ks: list[int]) -> list[float]:
+    """返回每个 k 下参考最佳移动位于静态排序前 k 个之内的比例"""
+    hits = np.zeros(len(ks))
+    for matrix, ref in zip(boards, refs):
+        ranked = [move for _, move in eliminate.rank_moves_static(matrix, weights)]
+        rank = ranked.index(simulator.MOVES[int(ref.argmax())])
+        hits += [rank < k for k in ks]
+    return list(hits / len(boards))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="静态评估剪枝的速度与排序质量")
+    parser.add_argument('--boards', type=int, default=200, help="测试棋盘数")
+    parser.add_argument('--simulations', type=int, default=1, help="find_best_move 每个移动的模拟次数")
+    parser.add_argument('--prune', type=int, nargs='+', default=[4, 8], help="剪枝保留的移动数")
+    parser.add_argument('--reference', type=int, default=200, help="参考答案每个移动的模拟次数")
+    parser.add_argument('--weights', help="evaluator.py 拟合的 .npy 权重，与默认权重对比召回率")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    weights = evaluator.load_weights(args.weights) if args.weights else None
+    rng = np.random.default_rng(args.seed)
+    boards = [b.astype(int) for b in simulator.random_boards(args.boards, rng)]
+    refs = [bench_crn.reference_scores(matrix, args.reference, rng) for matrix in boards]
+    print(f"棋盘 {args.boards} 个  simulations={args.simulations}  参考模拟 {args.reference} 次/移动")
+
+    for prune in [None, *args.prune]:
+        agree = 0
+        start = time.perf_counter()
+        for matrix, ref in zip(boards, refs):
+            move = eliminate.find_best_move(matrix, args.simulations, prune=prune, weights=weights)[0]
+            agree += ref[simulator.MOVE_INDEX[move]] == ref.max()
+        elapsed = (time.perf_counter() - start) / len(boards)
+        print(f"{'完整搜索' if prune is None else f'prune={prune}':<10} 每盘 {elapsed * 1000:6.2f}ms"
+              f"  与参考最佳移动一致 {agree / len(boards):6.1%}")
+
+    start = time.perf_counter()
+    for matrix in boards:
+        eliminate.rank_moves_static(matrix, weights)
+    print(f"{'静态排序':<10} 每盘 {(time.perf_counter() - start) / len(boards) * 1000:6.2f}ms")
+
+    ks = sorted({1, *args.prune})
+    candidates = [('默认权重', None)]
+    if args.weights:
+        candidates.append((args.weights, weights))
+    print("参考最佳移动在静态排序中的召回率")
+    for name, weights in candidates:
+        rates = recall(boards, refs, weights, ks)
+        print(f"  {name:<16}" + "  ".join(f"top-{k} {r:6.1%}" for k, r in zip(ks, rates)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+识别阶段基准
+用 template/ 中的方块贴图合成指定分辨率的棋盘截图，每帧随机改动若干方块，对比：
+    - full: convert_image_to_mat，每帧完整识别 64 个方块
+    - diff: DiffRecognizer，只重新识别像素变化过的方块
+贴图保留原有纹理，只把识别用的通道平移到 TEMPLATE_R，使每个方块都能被识别为对应颜色。
+逐帧校验：两种方式的棋盘都与真实棋盘一致，且 DiffRecognizer 维护的 mean_r 与 cell_means 一致
+（漏检的变化方块会让 mean_r 停留在旧值）。
+
+用法示例:
+    python bench_recognize.py --size 1152 --frames 200 --changed 6
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+import recognize
+
+
+def make_tiles(block: int) -> np.ndarray:
+    """
+    返回 (7, block, block, 3) 的方块贴图，下标为颜色编号（0 不使用）。
+    识别用的第 2 通道在中心 40 % 区域的均值对齐到 TEMPLATE_R，纹理幅度缩小为原来的 1/5 以免截断。
+    """
+    margin = int(block * 0.3)
+    tiles = np.zeros((7, block, block, 3), dtype=np.uint8)
+    for idx, name in enumerate(recognize.COLOR_NAMES):
+        tile = Image.open(os.path.join(recognize.TEMPLATE_DIR, f'{name}.png')).convert('RGB')
+        tile = np.asarray(tile.resize((block, block), Image.Resampling.LANCZOS)).astype(float)
+        channel = tile[:, :, 2]
+        center = channel[margin:block - margin, margin:block - margin].mean()
+        tile[:, :, 2] = recognize.TEMPLATE_R[idx] + (channel - center) * 0.2
+        tiles[idx + 1] = np.clip(np.rint(tile), 0, 255)
+    return tiles
+
+
+def make_frames(size: int, frames: int, changed: int, seed: int = 0) -> list:
+    """生成连续帧 [(真实棋盘, 截图), ...]：每帧在上一帧基础上随机替换 changed 个方块的颜色"""
+    rng = np.random.default_rng(seed)
+    block = size // 8
+    tiles = make_tiles(block)
+    board = rng.integers(1, 7, size=(8, 8))
+    canvas = tiles[board].transpose(0, 2, 1, 3, 4).reshape(size, size, 3)
+    images = []
+    for _ in range(frames):
+        cells = rng.choice(64, size=changed, replace=False)
+        board.flat[cells] = rng.integers(1, 7, size=changed)
+        for cell in cells:
+            i, j = divmod(int(cell), 8)
+            canvas[i * block:(i + 1) * block, j * block:(j + 1) * block] = tiles[board[i, j]]
+        images.append((board.copy(), as_screenshot(canvas)))
+    return images
+
+
+def as_screenshot(rgb: np.ndarray) -> Image.Image:
+    """按 recognize.capture_region 的方式（BGRX 原始位图 → frombuffer）构造截图，内部存储与真实截图一致"""
+    h, w = rgb.shape[:2]
+    bgrx = np.zeros((h, w, 4), dtype=np.uint8)
+    bgrx[:, :, :3] = rgb[:, :, ::-1]
+    return Image.frombuffer('RGB', (w, h), bgrx.tobytes(), 'raw', 'BGRX', 0, 1)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="识别阶段基准")
+    parser.add_argument('--size', type=int, default=1152, help="棋盘边长（像素），4K 为 1152")
+    parser.add_argument('--frames', type=int, default=200, help="帧数")
+    parser.add_argument('--changed', type=int, default=6, help="每帧改动的方块数")
+    args = parser.parse_args(argv)
+
+    frames = make_frames(args.size, args.frames, args.changed)
+
+    start = time.perf_counter()
+    full = [recognize.convert_image_to_mat(img) for _, img in frames]
+    full_time = time.perf_counter() - start
+
+    recognizer = recognize.DiffRecognizer(refresh_every=0)
+    diff, means, changed = [], [], 0
+    start = time.perf_counter()
+    for _, img in frames:
+        board, mask = recognizer.update(img)
+        diff.append(board.copy())
+        means.append(recognizer.mean_r.copy())
+        changed += int(mask.sum())
+    diff_time = time.perf_counter() - start
+
+    full_wrong = sum(not np.array_equal(truth, mat) for (truth, _), mat in zip(frames, full))
+    diff_wrong = sum(not np.array_equal(truth, mat) for (truth, _), mat in zip(frames, diff))
+    mean_wrong = sum(not np.allclose(recognize.cell_means(img), mean_r) for (_, img), mean_r in zip(frames, means))
+    print(f"棋盘 {args.size}x{args.size}  帧数 {args.frames}  每帧改动 {args.changed} 个方块")
+    print(f"full  每帧 {full_time / args.frames * 1000:6.2f}ms")
+    print(f"diff  每帧 {diff_time / args.frames * 1000:6.2f}ms  平均重新识别 {changed / args.frames:.1f} 个方块"
+          f"  加速 {full_time / max(diff_time, 1e-9):.1f}x")
+    print(f"识别错误的帧: full {full_wrong}  diff {diff_wrong}  mean_r 不一致的帧: {mean_wrong}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+启动开销基准
+在全新的子进程中导入运行时模块，报告导入耗时、常驻内存（RSS），
+并检查调试专用的重量级模块（matplotlib、PIL.ImageDraw 等）是否被顺带加载。
+
+用法示例:
+    python bench_startup.py
+    python bench_startup.py main recognize --repeat 10
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# 运行时路径：截图 → 识别 → 求解 → 点击
+RUNTIME_MODULES = ['eliminate', 'speculate', 'recognize', 'main']
+# 只应在调试/可视化时加载的模块
+DEBUG_MODULES = ['matplotlib', 'matplotlib.pyplot', 'PIL.ImageDraw', 'PIL.ImageFont']
+
+_CHILD = r'''
+import importlib, json, sys, time
+
+def rss_bytes():
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                        ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                        ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t)]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        ctypes.windll.psapi.GetProcessMemoryInfo(ctypes.windll.kernel32.GetCurrentProcess(), ctypes.byref(counters), counters.cb)
+        return counters.WorkingSetSize
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+name, debug_modules = sys.argv[1], json.loads(sys.argv[2])
+before = rss_bytes()
+start = time.perf_counter()
+error = None
+try:
+    if name:
+        importlib.import_module(name)
+except Exception as e:
+    error = f"{type(e).__name__}: {e}"
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "rss": rss_bytes(),
+    "rss_delta": rss_bytes() - before,
+    "debug_loaded": [m for m in debug_modules if m in sys.modules],
+    "error": error,
+}))
+'''
+
+
+def measure(module: str, repeat: int = 5) -> dict:
+    """
+    在 repeat 个全新子进程中导入 module，返回耗时与内存的中位数。
+
+    参数:
+        module: 模块名，空字符串表示只启动解释器（基线）
+        repeat: 重复次数
+    返回:
+        {'seconds', 'rss', 'rss_delta', 'debug_loaded', 'error'}
+    """
+    runs = []
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-c', _CHILD, module, json.dumps(DEBUG_MODULES)],
+                              capture_output=True, text=True, check=True)
+        runs.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+    return {
+        'seconds': statistics.median(r['seconds'] for r in runs),
+        'rss': statistics.median(r['rss'] for r in runs),
+        'rss_delta': statistics.median(r['rss_delta'] for r in runs),
+        'debug_loaded': runs[-1]['debug_loaded'],
+        'error': runs[-1]['error'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量运行时模块的导入耗时与内存")
+    parser.add_argument('modules', nargs='*', default=RUNTIME_MODULES, help="要测量的模块")
+    parser.add_argument('--repeat', type=int, default=5, help="每个模块重复测量次数（取中位数）")
+    args = parser.parse_args(argv)
+
+    base = measure('', args.repeat)
+    print(f"{'模块':<12}{'导入耗时':>10}{'RSS':>10}{'增量':>10}  调试模块")
+    print(f"{'(解释器)':<12}{'-':>10}{base['rss'] / 2**20:>8.1f}MB{'-':>10}")
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        if result['error']:
+            print(f"{module:<12}导入失败: {result['error']}")
+            continue
+        debug = ', '.join(result['debug_loaded']) or '无'
+        print(f"{module:<12}{result['seconds'] * 1000:>8.1f}ms{result['rss'] / 2**20:>8.1f}MB{result['rss_delta'] / 2**20:>8.1f}MB  {debug}")
+
+
+if __name__ == "__main__":
+    main()
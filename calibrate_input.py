@@ -0,0 +1,133 @@
+"""
+点击间隔实测校准
+在真实游戏窗口上从大到小尝试候选间隔，找出游戏仍能可靠接收的最小点击间隔：
+    1. click_gap: 每次执行一个交换，两次点击间隔为候选值
+    2. move_gap: click_gap 取上一步结果，每次连续执行 eliminate.plan_moves 规划的两个交换，交换间隔为候选值
+每次执行前等待棋盘静止，执行后等待动画结束再截图；交换影响范围（predict_swap 的 footprint）内
+有方块变化即视为游戏接收到了这次交换。某个间隔的全部尝试都成功才算通过，遇到第一个失败的间隔即停止。
+结果乘以安全系数后写入 JSON，main.py / sessions.py 启动时通过 input_backend.load_timing 读取；
+click_gap 为 0 时 Win32Backend 把一次交换的两次点击合并为一次 SendInput。
+
+运行前打开游戏并停在可以操作的棋盘上，运行期间不要移动鼠标（移到屏幕角落可紧急停止）。
+
+用法示例:
+    python calibrate_input.py --trials 5 --out click_timing.json
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+import eliminate
+import input_backend
+import recognize
+
+TITLE_KEYWORD = "《星际争霸II》"
+CANDIDATES = (0.05, 0.03, 0.02, 0.01, 0.005, 0.0)
+
+
+def capture_stable(interval: float = 0.3, timeout: float = 10.0):
+    """连续两次截图识别结果相同时返回 (棋盘, 棋盘屏幕坐标)，超时或找不到窗口返回 None"""
+    previous = None
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        img, location = recognize.screenshot_window(TITLE_KEYWORD)
+        if not img or not location:
+            return None
+        mat = recognize.convert_image_to_mat(img)
+        if previous is not None and np.array_equal(mat, previous):
+            return mat, location
+        previous = mat
+        time.sleep(interval)
+    return None
+
+
+def trial(backend: input_backend.InputBackend, moves: int, settle: float) -> bool | None:
+    """
+    执行一次尝试。
+
+    返回:
+        True/False 表示 moves 个交换是否全部被游戏接收；棋盘不足 moves 个互不干扰的移动时返回 None
+    """
+    frame = capture_stable()
+    if frame is None:
+        return None
+    mat, (left, top, right, _) = frame
+    plan = eliminate.plan_moves(mat, moves, 1)
+    if len(plan) < moves:
+        return None
+    cell_size = (right - left) // 8
+    footprints = []
+    for ((r1, c1), (r2, c2)), _, _ in plan:
+        footprints.append(eliminate.predict_swap(mat, r1, c1, r2, c2)[3])
+        p1 = (left + c1 * cell_size + cell_size // 2, top + r1 * cell_size + cell_size // 2)
+        p2 = (left + c2 * cell_size + cell_size // 2, top + r2 * cell_size + cell_size // 2)
+        backend.swap(p1, p2)
+    time.sleep(settle)
+    after = capture_stable()
+    if after is None:
+        return None
+    return all((after[0][footprint] != mat[footprint]).any() for footprint in footprints)
+
+
+def search(backend: input_backend.InputBackend, field: str, moves: int, trials: int, settle: float) -> float | None:
+    """从大到小尝试 CANDIDATES，返回全部尝试都成功的最小间隔；最大的候选值也失败时返回 None"""
+    passed = None
+    for gap in CANDIDATES:
+        setattr(backend.timing, field, gap)
+        results = []
+        attempts = 0
+        while len(results) < trials and attempts < trials * 3:
+            attempts += 1
+            result = trial(backend, moves, settle)
+            if result is not None:
+                results.append(result)
+        ok = len(results) == trials and all(results)
+        print(f"{field} = {gap * 1000:5.1f}ms  成功 {sum(results)}/{len(results)}")
+        if not ok:
+            break
+        passed = gap
+    return passed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="实测校准点击间隔")
+    parser.add_argument('--trials', type=int, default=5, help="每个候选间隔的尝试次数")
+    parser.add_argument('--settle', type=float, default=1.5, help="执行交换后等待动画的时间（秒）")
+    parser.add_argument('--margin', type=float, default=1.5, help="安全系数，结果乘以该值")
+    parser.add_argument('--backend', default='auto', help="输入后端: auto / win32 / pyautogui")
+    parser.add_argument('--out', default='click_timing.json', help="结果文件")
+    args = parser.parse_args(argv)
+
+    backend = input_backend.create_backend(args.backend, input_backend.ClickTiming(CANDIDATES[0], CANDIDATES[0]))
+    print("3 秒后开始，请切换到游戏窗口，期间不要移动鼠标")
+    time.sleep(3)
+    try:
+        click_gap = search(backend, 'click_gap', 1, args.trials, args.settle)
+        if click_gap is None:
+            print("最大候选间隔也未能稳定生效，保持默认值")
+            return
+        backend.timing.click_gap = click_gap * args.margin
+        move_gap = search(backend, 'move_gap', 2, args.trials, args.settle)
+        if move_gap is None:
+            print("最大候选间隔也未能稳定生效，保持默认值")
+            return
+    except input_backend.FailSafeError as e:
+        print(f"⛔ {e}")
+        return
+
+    result = {
+        'click_gap': click_gap * args.margin,
+        'move_gap': move_gap * args.margin,
+        'trials': args.trials,
+        'backend': type(backend).__name__,
+        'calibrated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"click_gap {result['click_gap'] * 1000:.1f}ms  move_gap {result['move_gap'] * 1000:.1f}ms  已写入 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,26 @@
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
 import numpy as np
-import recognize
-from PIL import Image, ImageDraw, ImageFont
+
+if TYPE_CHECKING:
+    from PIL import Image
 
 
-def find_best_move(matrix: np.ndarray, simulations: int = 3) -> tuple[tuple[tuple[int, int], tuple[int, int]], int, int, int]:
+@lru_cache(maxsize=None)
+def adjacent_moves(rows: int = 8, cols: int = 8) -> tuple[tuple[tuple[int, int], tuple[int, int]], ...]:
+    """全部相邻交换 ((r1, c1), (r2, c2))，按行遍历，每格先向右再向下，与 find_best_move 的遍历顺序一致"""
+    moves = []
+    for i in range(rows):
+        for j in range(cols):
+            if j < cols - 1:
+                moves.append(((i, j), (i, j + 1)))
+            if i < rows - 1:
+                moves.append(((i, j), (i + 1, j)))
+    return tuple(moves)
+
+
+def find_best_move(matrix: np.ndarray, simulations: int = 3, prune: int | None = None, weights: np.ndarray | None = None) -> tuple[tuple[tuple[int, int], tuple[int, int]], int, int, int]:
     """找出能引发最长连锁的最佳交换
     
     评分 = (连锁轮数 * 10 + 总消除数)  # 权重确保连锁优先
@@ -11,6 +28,8 @@ def find_best_move(matrix: np.ndarray, simulations: int = 3) -> tuple[tuple[tupl
     参数:
         matrix: 棋盘矩阵8*8
         simulations: 每个移动的模拟次数，因为掉下来的方块随机 
+        prune: 若指定，先用静态评估（rank_moves_static）排序，只对前 prune 个移动做完整模拟
+        weights: 静态评估权重，默认 evaluator.DEFAULT_WEIGHTS
     返回:
         best_move: 最佳移动位置 ((r1, c1), (r2, c2))
         best_elim: 预计最大消除数量
@@ -23,11 +42,15 @@ def find_best_move(matrix: np.ndarray, simulations: int = 3) -> tuple[tuple[tupl
     best_elim = 0
     best_chain = 0
     total_moves = 0
+    allowed = None
+    if prune is not None:
+        ranked = rank_moves_static(matrix, weights)
+        allowed = {move for _, move in ranked[:prune]}
     # 遍历所有可能的相邻交换
     for i in range(rows):
         for j in range(cols):
             # 向右交换
-            if j < cols - 1:
+            if j < cols - 1 and (allowed is None or ((i, j), (i, j + 1)) in allowed):
                 max_elim, max_chain = evaluate_move_expectation(matrix, i, j, i, j + 1, simulations)
                 score = max_elim + max_chain * 10  # 连锁优先
                 total_moves += 1 if max_chain > 0 else 0  # 仅计入有效移动
@@ -38,7 +61,7 @@ def find_best_move(matrix: np.ndarray, simulations: int = 3) -> tuple[tuple[tupl
                     best_chain = max_chain
 
             # 向下交换
-            if i < rows - 1:
+            if i < rows - 1 and (allowed is None or ((i, j), (i + 1, j)) in allowed):
                 max_elim, max_chain = evaluate_move_expectation(matrix, i, j, i + 1, j, simulations)
                 score = max_elim + max_chain * 10
                 total_moves += 1 if max_chain > 0 else 0  # 仅计入有效移动
@@ -47,9 +70,41 @@ def find_best_move(matrix: np.ndarray, simulations: int = 3) -> tuple[tuple[tupl
                     best_move = ((i, j), (i + 1, j))
                     best_elim = max_elim
                     best_chain = max_chain
+    if prune is not None:
+        total_moves = len(ranked)  # 被剪掉的有效移动同样计入
     return best_move, best_elim, best_chain, total_moves
 
 
+def rank_moves_static(matrix: np.ndarray, weights: np.ndarray | None = None) -> list[tuple[float, tuple[tuple[int, int], tuple[int, int]]]]:
+    """
+    不做随机模拟，用确定部分的得分加静态评估给所有有效移动排序。
+
+    静态评分 = 确定的消除数 + 确定的连锁轮数 * 10 + evaluator.evaluate(预测棋盘)，
+    预测棋盘与 predict_swap 相同（simulator.resolve 不补充新方块），顶部未知的新方块记为 0。
+
+    参数:
+        matrix: 棋盘矩阵8*8
+        weights: 静态评估权重，默认 evaluator.DEFAULT_WEIGHTS
+    返回:
+        按静态评分从高到低排列的 [(score, move), ...]，只包含能产生消除的移动
+    """
+    import evaluator  # 仅在剪枝时使用
+    import simulator
+
+    # 位棋盘一次筛出有效移动，再整批交换、结算确定部分（不补充），结果与逐个 predict_swap 相同
+    board = matrix[None].astype(np.int8)
+    idx = np.flatnonzero(simulator.valid_moves(board)[0])
+    if not idx.size:
+        return []
+    boards = np.repeat(board, idx.size, axis=0)
+    simulator.swap(boards, idx)
+    elim, chain = simulator.resolve(boards, None)
+    moves = [simulator.MOVES[k] for k in idx]
+    scores = elim + chain * 10 + evaluator.evaluate(boards, weights)
+    order = np.argsort(-scores, kind='stable')
+    return [(float(scores[k]), moves[k]) for k in order]
+
+
 def evaluate_move_expectation(matrix: np.ndarray, r1: int, c1: int, r2: int, c2: int, simulations: int = 3) -> tuple[int, int]:
     """
     对一次移动进行多次模拟，并返回最大连锁轮数和最大总消除数。
@@ -72,7 +127,86 @@ def evaluate_move_expectation(matrix: np.ndarray, r1: int, c1: int, r2: int, c2:
     return max_elim, max_chain
 
 
-def simulate_swap(matrix: np.ndarray, r1: int, c1: int, r2: int, c2: int, seed: int = 42) -> tuple[int, int]:
+def evaluate_moves_crn(matrix: np.ndarray, max_simulations: int = 64, min_simulations: int = 8, batch: int = 8, z: float = 1.96, seed: int = 0) -> tuple[list[dict], int]:
+    """
+    公共随机数（CRN）模拟：每一轮模拟预先抽好一组新方块，所有候选移动都用同一组新方块结算，
+    移动之间的差异不再被各自不同的随机掉落掩盖，用更少的模拟次数就能分出优劣。
+
+    评分 = 总消除数 + 连锁轮数 * 10，取各轮平均值。每完成 batch 轮（且不少于 min_simulations）检查一次：
+    领先移动与第二名逐轮评分之差的置信下界大于 0 时提前停止。
+
+    参数:
+        matrix: 棋盘矩阵8*8
+        max_simulations: 最多模拟轮数（不少于 min_simulations）
+        min_simulations: 提前停止前至少模拟的轮数，至少为 2，置信区间需要至少两个样本
+        batch: 每次检查之间的模拟轮数
+        z: 置信区间的 z 值，默认 1.96（95%）
+        seed: 抽样新方块的随机种子
+    返回:
+        stats: 按平均评分从高到低排列的
+               [{'move', 'score', 'ci', 'elim', 'chain'}, ...]，ci 为评分置信区间半宽
+        simulations: 实际模拟轮数
+    """
+    rows, cols = matrix.shape
+    # 第一轮消除是确定的，先剔除不产生消除的交换
+    moves = []
+    for (i, j), (r2, c2) in adjacent_moves(rows, cols):
+        board = matrix.copy()
+        board[i][j], board[r2][c2] = board[r2][c2], board[i][j]
+        if find_and_eliminate(board) > 0:
+            moves.append(((i, j), (r2, c2)))
+    if not moves:
+        return [], 0
+
+    min_simulations = max(2, min_simulations)
+    max_simulations = max(max_simulations, min_simulations)
+    rng = np.random.default_rng(seed)
+    depth = rows * 4  # 每列预备的新方块数，连锁极长时循环使用
+    elims = np.zeros((max_simulations, len(moves)))
+    chains = np.zeros((max_simulations, len(moves)))
+    n = 0
+    while n < max_simulations:
+        for k in range(n, min(n + batch, max_simulations)):
+            refill = rng.integers(1, 7, size=(cols, depth))
+            for m, ((r1, c1), (r2, c2)) in enumerate(moves):
+                elims[k, m], chains[k, m] = simulate_swap(matrix, r1, c1, r2, c2, refill=refill)
+        n = min(n + batch, max_simulations)
+        if n < min_simulations:
+            continue
+        if len(moves) == 1:
+            break
+        scores = elims[:n] + chains[:n] * 10
+        order = np.argsort(scores.mean(axis=0), kind='stable')[::-1]
+        leader = order[0]
+        # 每轮结果完全相同的移动（如交换后棋盘一致）视为等价，和第一个不等价的移动比较
+        rivals = [m for m in order[1:] if not np.array_equal(scores[:, m], scores[:, leader])]
+        if not rivals:
+            break
+        diff = scores[:, leader] - scores[:, rivals[0]]
+        if diff.mean() - z * diff.std(ddof=1) / np.sqrt(n) > 0:
+            break
+
+    scores = elims[:n] + chains[:n] * 10
+    half = z * scores.std(axis=0, ddof=1) / np.sqrt(n)  # n >= 2
+    stats = [
+        {'move': move, 'score': float(scores[:, m].mean()), 'ci': float(half[m]),
+         'elim': float(elims[:n, m].mean()), 'chain': float(chains[:n, m].mean())}
+        for m, move in enumerate(moves)
+    ]
+    stats.sort(key=lambda item: item['score'], reverse=True)
+    return stats, n
+
+
+def find_best_move_crn(matrix: np.ndarray, max_simulations: int = 64, min_simulations: int = 8, seed: int = 0) -> tuple[tuple[tuple[int, int], tuple[int, int]], float, float, int]:
+    """find_best_move 的公共随机数版本，返回值格式相同（消除数、连锁轮数为平均值），参数见 evaluate_moves_crn"""
+    stats, _ = evaluate_moves_crn(matrix, max_simulations, min_simulations, seed=seed)
+    if not stats:
+        return ((0, 0), (0, 0)), 0, 0, 0
+    best = stats[0]
+    return best['move'], best['elim'], best['chain'], len(stats)
+
+
+def simulate_swap(matrix: np.ndarray, r1: int, c1: int, r2: int, c2: int, seed: int = 42, refill: np.ndarray | None = None) -> tuple[int, int]:
     """
     模拟交换之后的情况
         
@@ -81,6 +215,7 @@ def simulate_swap(matrix: np.ndarray, r1: int, c1: int, r2: int, c2: int, seed:
         r1, c1: 第一个方块位置
         r2, c2: 第二个方块位置
         seed: 随机种子，默认为 42
+        refill: 可选的预先抽样的新方块 (cols, depth)，第 j 列依次使用 refill[j]，见 simulate_fall
     返回:
         总消除数量, 连锁轮数
     """
@@ -90,6 +225,7 @@ def simulate_swap(matrix: np.ndarray, r1: int, c1: int, r2: int, c2: int, seed:
 
     total_eliminated = 0
     chain_rounds = 0
+    cursor = None if refill is None else np.zeros(board.shape[1], dtype=int)
 
     while True:
         eliminated_this_round = find_and_eliminate(board)
@@ -97,7 +233,7 @@ def simulate_swap(matrix: np.ndarray, r1: int, c1: int, r2: int, c2: int, seed:
             break
         total_eliminated += eliminated_this_round
         chain_rounds += 1
-        simulate_fall(board, seed)
+        simulate_fall(board, seed, refill, cursor)
 
     return total_eliminated, chain_rounds
 
@@ -156,12 +292,14 @@ def find_and_eliminate(board: np.ndarray) -> int:
     return len(to_eliminate)
 
 
-def simulate_fall(board: np.ndarray, seed: int = 0) -> None:
+def simulate_fall(board: np.ndarray, seed: int = 0, refill: np.ndarray | None = None, cursor: np.ndarray | None = None) -> None:
     """模拟方块下落，并在顶部生成新的随机方块（1-6）
     
     参数:
         board: 棋盘矩阵
         seed: 随机种子，默认为0
+        refill: 可选的预先抽样的新方块 (cols, depth)，给定时第 j 列按顺序取 refill[j]，用完后循环
+        cursor: 与 refill 配合使用的每列已取数量，原地更新
     """
     rows, cols = board.shape
     for j in range(cols):
@@ -175,10 +313,126 @@ def simulate_fall(board: np.ndarray, seed: int = 0) -> None:
         for i in range(rows - 1, -1, -1):
             if col_vals:
                 board[i][j] = col_vals.pop()
+            elif refill is not None and cursor is not None:
+                board[i][j] = refill[j][cursor[j] % refill.shape[1]]
+                cursor[j] += 1
             else:
                 board[i][j] = np.random.randint(1, 7)  # 新方块 1~6
 
 
+def apply_gravity(board: np.ndarray) -> None:
+    """模拟方块下落，但不生成新方块，顶部空位保持为 0（表示未知）
+
+    参数:
+        board: 棋盘矩阵
+    """
+    rows, cols = board.shape
+    for j in range(cols):
+        col_vals = [board[i][j] for i in range(rows) if board[i][j] != 0]
+        board[:, j] = 0
+        for k, val in enumerate(reversed(col_vals)):
+            board[rows - 1 - k][j] = val
+
+
+def predict_swap(matrix: np.ndarray, r1: int, c1: int, r2: int, c2: int) -> tuple[np.ndarray, int, int, np.ndarray]:
+    """
+    只模拟交换之后确定的部分：消除与下落，不补充新方块。
+    新方块位置保持为 0（未知），find_and_eliminate 会跳过它们，
+    所以后续轮次只统计由已知方块构成的连锁。
+
+    参数:
+        matrix: 棋盘矩阵
+        r1, c1: 第一个方块位置
+        r2, c2: 第二个方块位置
+    返回:
+        board: 预测棋盘，0 代表未知的新方块
+        total_eliminated: 确定的消除数量
+        chain_rounds: 确定的连锁轮数
+        footprint: bool 矩阵，这次移动可能改变的格子（交换位置，以及每列最低消除位置及其上方）
+    """
+    rows, cols = matrix.shape
+    board = matrix.copy()
+    board[r1][c1], board[r2][c2] = board[r2][c2], board[r1][c1]
+    footprint = np.zeros((rows, cols), dtype=bool)
+    footprint[r1][c1] = footprint[r2][c2] = True
+
+    total_eliminated = 0
+    chain_rounds = 0
+    while True:
+        before = board != 0
+        eliminated_this_round = find_and_eliminate(board)
+        if eliminated_this_round == 0:
+            break
+        total_eliminated += eliminated_this_round
+        chain_rounds += 1
+        # 消除格及其上方的整段列都会下落
+        hit = before & (board == 0)
+        for j in np.flatnonzero(hit.any(axis=0)):
+            lowest = np.flatnonzero(hit[:, j]).max()
+            footprint[:lowest + 1, j] = True
+        apply_gravity(board)
+
+    return board, total_eliminated, chain_rounds, footprint
+
+
+# 各求解器的默认模拟次数（crn 为最多模拟轮数），取自 bench_crn.py：
+# crn 4 轮与 independent 2 次耗时相当，与参考最佳移动的一致率 69% 对 47%
+SOLVER_SIMULATIONS = {'independent': 1, 'crn': 4}
+
+
+def plan_moves(matrix: np.ndarray, max_moves: int = 3, simulations: int = 1, margin: int = 2, solver: str = 'independent',
+               prune: int | None = None, weights: np.ndarray | None = None) -> list[tuple[tuple[tuple[int, int], tuple[int, int]], int, int]]:
+    """规划一帧内可以连续执行、互不干扰的多个交换
+
+    按求解器的评分从高到低挑选移动，只有当它的影响范围（predict_swap 的 footprint）
+    与已选移动的影响范围不重叠时才加入。为了覆盖新方块落下后在相邻列横向引发的连锁，
+    已选范围会向左右各扩展 margin 列。
+
+    参数:
+        matrix: 棋盘矩阵8*8
+        max_moves: 最多返回的移动数量
+        simulations: 每个移动的模拟次数（crn 时为最多模拟轮数）
+        margin: 影响范围横向扩展的列数
+        solver: 'independent'（find_best_move 的评分）或 'crn'（evaluate_moves_crn 的平均评分，elim/chain 为平均值）
+        prune: independent 时若指定，只模拟静态评估（rank_moves_static）前 prune 个移动
+        weights: 静态评估权重，默认 evaluator.DEFAULT_WEIGHTS
+    返回:
+        按执行顺序排列的 [(move, elim, chain), ...]，无可用移动时为空列表
+    """
+    rows, cols = matrix.shape
+    candidates = []
+    if solver == 'crn':
+        stats, _ = evaluate_moves_crn(matrix, max_simulations=simulations, min_simulations=min(8, simulations))
+        candidates = [(s['score'], s['move'], s['elim'], s['chain']) for s in stats]
+    elif solver == 'independent':
+        allowed = None if prune is None else {move for _, move in rank_moves_static(matrix, weights)[:prune]}
+        for (i, j), (r2, c2) in adjacent_moves(rows, cols):
+            if allowed is not None and ((i, j), (r2, c2)) not in allowed:
+                continue
+            max_elim, max_chain = evaluate_move_expectation(matrix, i, j, r2, c2, simulations)
+            if max_chain > 0:
+                candidates.append((max_elim + max_chain * 10, ((i, j), (r2, c2)), max_elim, max_chain))
+    else:
+        raise ValueError(f"未知求解器: {solver}")
+    # 分数相同时保持遍历顺序，与 find_best_move 的首选一致
+    candidates.sort(key=lambda item: item[0], reverse=True)
+
+    plan = []
+    blocked = np.zeros((rows, cols), dtype=bool)
+    for _, move, elim, chain in candidates:
+        (r1, c1), (r2, c2) = move
+        footprint = predict_swap(matrix, r1, c1, r2, c2)[3]
+        if (footprint & blocked).any():
+            continue
+        plan.append((move, elim, chain))
+        if len(plan) >= max_moves:
+            break
+        for d in range(-margin, margin + 1):
+            lo, hi = max(0, d), min(cols, cols + d)
+            blocked[:, lo:hi] |= footprint[:, lo - d:hi - d]
+    return plan
+
+
 def print_board(board, title="棋盘"):
     """打印棋盘状态"""
     print(f"{title}:")
@@ -222,7 +476,7 @@ def visualize_move(matrix, move):
     return total_eliminated, chain_count
 
 
-def draw_best_move_on_board_image(img: Image.Image, best_move: tuple, block: int) -> Image.Image:
+def draw_best_move_on_board_image(img: "Image.Image", best_move: tuple, block: int) -> "Image.Image":
     """在动态尺寸棋盘图上绘制最佳移动箭头与圆圈，方便调试。
     
     用于调试是否识别正确。
@@ -233,6 +487,8 @@ def draw_best_move_on_board_image(img: Image.Image, best_move: tuple, block: int
     返回:
         带有标记的 PIL Image 对象
     """
+    from PIL import ImageDraw, ImageFont  # 仅调试绘制使用，首次调用时才加载
+
     # 创建可绘制对象
     draw = ImageDraw.Draw(img)
 
@@ -265,6 +521,8 @@ def draw_best_move_on_board_image(img: Image.Image, best_move: tuple, block: int
 
 
 if __name__ == "__main__":
+    import recognize
+
     img, _ = recognize.screenshot_window("《星际争霸II》", debug=True)
     if img:
         matrix = recognize.convert_image_to_mat(img)
@@ -0,0 +1,208 @@
+"""
+静态棋盘评估
+不做任何随机模拟，只用位棋盘统计几类廉价的形状特征，线性加权后估计棋盘的后续潜力：
+    - 横 / 竖方向的"差一步"形状（两连或隔一个的同色方块，且第三个位置的邻居里有同色方块可以换过来）
+    - 下半区（第 4-7 行）的"差一步"形状，消除后上方方块下落更容易形成连锁
+    - 同色相邻对的数量（颜色聚集度）
+    - 竖直方向隔一格的同色方块（中间被消除后会直接连成一线）
+    - 未知 / 空格数量（predict_swap 预测棋盘中的 0）
+整批 (N, 8, 8) 棋盘一次计算，可作为 eliminate.find_best_move 的剪枝依据。
+权重可用模拟对局或录制的棋盘离线拟合：与 eliminate.rank_moves_static 的用法一致，
+训练样本是对这些棋盘执行一个有效移动后 predict_swap 给出的预测棋盘（顶部新方块为 0），
+拟合目标是把 0 随机补齐后继续对局的得分。
+
+用法示例:
+    python evaluator.py --samples 20000 --horizon 5 --out weights.npy
+    python evaluator.py --boards recorded_boards.npy --out weights.npy
+"""
+import argparse
+import time
+
+import numpy as np
+
+import eliminate
+import simulator
+
+FEATURE_NAMES = ['bias', 'near_h', 'near_v', 'near_low', 'cluster', 'stack', 'unknown']
+
+# 拟合前使用的默认权重（与 FEATURE_NAMES 一一对应），量纲与 得分 = 消除数 + 连锁轮数 * 10 一致
+DEFAULT_WEIGHTS = np.array([0.0, 1.5, 1.5, 2.0, 0.5, 1.0, 1.0])
+
+_COL = np.arange(64, dtype=np.uint64) % np.uint64(8)
+_ROW = np.arange(64, dtype=np.uint64) // np.uint64(8)
+
+
+def _mask(select: np.ndarray) -> np.uint64:
+    return np.bitwise_or.reduce(simulator._BIT_WEIGHTS[select])
+
+
+_NOT_COL0 = _mask(_COL != 0)
+_NOT_COL7 = _mask(_COL != 7)
+_COL_LE5 = _mask(_COL <= 5)
+_LOWER = _mask(_ROW >= 4)
+_S1, _S2, _S8, _S16 = np.uint64(1), np.uint64(2), np.uint64(8), np.uint64(16)
+
+
+def features(boards: np.ndarray) -> np.ndarray:
+    """
+    计算一批棋盘的形状特征。
+
+    参数:
+        boards: (N, 8, 8) 棋盘数组，0 代表空 / 未知
+    返回:
+        (N, len(FEATURE_NAMES)) float 特征矩阵
+    """
+    bb = simulator.to_bitboards(boards)  # (6, N)
+    occupied = np.bitwise_or.reduce(bb, axis=0)
+
+    # 同色方块出现在上下 / 左右相邻位置的格子集合
+    up_down = (bb << _S8) | (bb >> _S8)
+    left = (bb & _NOT_COL7) << _S1  # 左边是同色
+    right = (bb & _NOT_COL0) >> _S1  # 右边是同色
+    left_right = left | right
+    above = bb << _S8  # 正上方是同色
+
+    # 横向：两连 (p, p+1) 的左右目标格，隔一个 (p, p+2) 的中间目标格
+    pair_h = bb & (bb >> _S1) & _NOT_COL7
+    gap_h = bb & (bb >> _S2) & _COL_LE5
+    near_h = (((pair_h & _COL_LE5) << _S2) & (up_down | right)) \
+        | (((pair_h & _NOT_COL0) >> _S1) & (up_down | left)) \
+        | ((gap_h << _S1) & up_down)
+    # 竖向：两连 (p, p+8) 的上下目标格，隔一个 (p, p+16) 的中间目标格
+    pair_v = bb & (bb >> _S8)
+    gap_v = bb & (bb >> _S16)
+    near_v = ((pair_v << _S16) & (left_right | (bb >> _S8))) \
+        | ((pair_v >> _S8) & (left_right | above)) \
+        | ((gap_v << _S8) & left_right)
+    # 目标格必须有方块且不是同色（同色说明已经连成 3 个）
+    target_ok = occupied & ~bb
+    near_h &= target_ok
+    near_v &= target_ok
+
+    out = np.empty((boards.shape[0], len(FEATURE_NAMES)))
+    out[:, 0] = 1.0
+    out[:, 1] = np.bitwise_count(near_h).sum(axis=0)
+    out[:, 2] = np.bitwise_count(near_v).sum(axis=0)
+    out[:, 3] = np.bitwise_count((near_h | near_v) & _LOWER).sum(axis=0)
+    out[:, 4] = (np.bitwise_count(pair_h) + np.bitwise_count(pair_v)).sum(axis=0)
+    out[:, 5] = np.bitwise_count(gap_v & ~(bb >> _S8)).sum(axis=0)
+    out[:, 6] = 64 - np.bitwise_count(occupied)
+    return out
+
+
+def evaluate(boards: np.ndarray, weights: np.ndarray | None = None) -> np.ndarray:
+    """
+    批量静态评分。
+
+    参数:
+        boards: (N, 8, 8) 或 (8, 8) 棋盘
+        weights: 特征权重，默认 DEFAULT_WEIGHTS
+    返回:
+        (N,) 评分（单个棋盘时为长度 1 的数组）
+    """
+    boards = np.asarray(boards)
+    if boards.ndim == 2:
+        boards = boards[None]
+    w = DEFAULT_WEIGHTS if weights is None else weights
+    return features(boards) @ w
+
+
+def rollout_value(boards: np.ndarray, horizon: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    拟合目标：棋盘中的 0 先随机补齐，补齐后新方块引发的连锁（predict_swap 无法确定的部分）计入得分，
+    再用向量化贪心策略走 horizon 步，返回累计得分。
+    """
+    boards = boards.astype(np.int8, copy=True)
+    simulator.refill(boards, rng)
+    elim, chains = simulator.resolve(boards, rng)
+    total = (elim + chains * 10).astype(float)
+    for _ in range(horizon):
+        moves = simulator.greedy_policy(boards)
+        if (moves < 0).all():
+            break
+        simulator.swap(boards, moves)
+        elim, chains = simulator.resolve(boards, rng)
+        total += elim + chains * 10
+    return total
+
+
+def sample_boards(n: int, rng: np.random.Generator, max_steps: int = 30) -> np.ndarray:
+    """用模拟对局采样训练棋盘：随机初始棋盘按贪心策略走随机步数后的局面"""
+    boards = simulator.random_boards(n, rng)
+    steps = rng.integers(0, max_steps + 1, size=n)
+    for t in range(max_steps):
+        moves = simulator.greedy_policy(boards)
+        moves[steps <= t] = -1
+        if (moves < 0).all():
+            break
+        simulator.swap(boards, moves)
+        simulator.resolve(boards, rng)
+    return boards
+
+
+def move_boards(boards: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    把完整棋盘转换为 rank_moves_static 实际评估的那类棋盘：
+    每个棋盘随机执行一个有效移动，取 eliminate.predict_swap 的预测棋盘（未补齐，0 为未知的新方块）。
+    没有有效移动的棋盘被丢弃。
+    """
+    valid = simulator.valid_moves(boards)
+    out = []
+    for board, mask in zip(boards, valid):
+        candidates = np.flatnonzero(mask)
+        if len(candidates) == 0:
+            continue
+        (r1, c1), (r2, c2) = simulator.MOVES[rng.choice(candidates)]
+        out.append(eliminate.predict_swap(board.astype(int), r1, c1, r2, c2)[0])
+    return np.array(out, dtype=np.int8).reshape(-1, 8, 8)
+
+
+def fit_weights(boards: np.ndarray, targets: np.ndarray, l2: float = 1e-3) -> np.ndarray:
+    """岭回归拟合特征权重，返回与 FEATURE_NAMES 对应的权重向量"""
+    x = features(boards)
+    reg = l2 * len(x) * np.eye(x.shape[1])
+    reg[0, 0] = 0.0  # 偏置项不做正则
+    return np.linalg.solve(x.T @ x + reg, x.T @ targets)
+
+
+def load_weights(path: str) -> np.ndarray:
+    """读取 fit_weights 保存的 .npy 权重文件"""
+    weights = np.load(path)
+    if weights.shape != (len(FEATURE_NAMES),):
+        raise ValueError(f"权重长度应为 {len(FEATURE_NAMES)}，实际为 {weights.shape}")
+    return weights
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线拟合静态评估权重")
+    parser.add_argument('--boards', help="录制的棋盘 .npy，形状 (N, 8, 8)；不指定则用模拟对局采样")
+    parser.add_argument('--samples', type=int, default=20000, help="模拟采样的棋盘数")
+    parser.add_argument('--horizon', type=int, default=5, help="拟合目标：贪心走多少步的累计得分")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    parser.add_argument('--out', help="保存权重的 .npy 路径")
+    args = parser.parse_args(argv)
+
+    rng = np.random.default_rng(args.seed)
+    base = np.load(args.boards) if args.boards else sample_boards(args.samples, rng)
+    boards = move_boards(base, rng)
+    targets = rollout_value(boards, args.horizon, rng)
+    weights = fit_weights(boards, targets)
+
+    pred = features(boards) @ weights
+    r2 = 1 - ((targets - pred) ** 2).sum() / ((targets - targets.mean()) ** 2).sum()
+    for name, w in zip(FEATURE_NAMES, weights):
+        print(f"{name:<10}{w:>10.3f}")
+    print(f"样本数: {len(boards)}  R²: {r2:.3f}")
+
+    start = time.perf_counter()
+    evaluate(boards, weights)
+    elapsed = time.perf_counter() - start
+    print(f"评估速度: {len(boards) / elapsed / 1000:.0f} 个棋盘/毫秒")
+
+    if args.out:
+        np.save(args.out, weights)
+        print(f"权重已保存: {args.out}")
+
+
+if __name__ == "__main__":
+    main()
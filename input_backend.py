@@ -0,0 +1,254 @@
+"""
+鼠标输入后端
+统一的点击接口，点击间隔按截止时间调度：后端自身调用耗时计入间隔，而不是在固定 sleep 之外额外叠加；
+time.sleep 的超时误差（Windows 下可达 10 ms 以上）通过实测校准，最后不足 1 ms 的部分忙等补齐。
+
+    - Win32Backend: 通过 ctypes 调用 SendInput，一次交换的两次点击可以合并为一次系统调用
+    - PyAutoGUIBackend: 兼容后端（非 Windows 或 SendInput 不可用时）
+    - RecordingBackend: 只记录带时间戳的事件，用于在 Linux 上测试与基准点击阶段的时序
+
+与 pyautogui.FAILSAFE 相同，真实后端在每次点击/移动前检查鼠标是否位于主屏幕四个角之一，
+是则抛出 FailSafeError，调用方据此紧急停止。
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+import statistics
+import sys
+import threading
+import time
+
+
+def calibrate_sleep(samples: int = 20, request: float = 0.001) -> float:
+    """
+    实测 time.sleep 比请求时长多睡的时间（中位数），用于提前醒来。
+
+    参数:
+        samples: 采样次数
+        request: 每次请求的睡眠时长（秒）
+    返回:
+        超出时长（秒），不小于 0
+    """
+    overshoot = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        time.sleep(request)
+        overshoot.append(time.perf_counter() - start - request)
+    return max(0.0, statistics.median(overshoot))
+
+
+class FailSafeError(Exception):
+    """鼠标被移到主屏幕角落时抛出，表示用户要求紧急停止"""
+
+
+class ClickTiming:
+    """
+    点击时序参数。
+
+    参数:
+        click_gap: 一次交换中两次点击之间的目标间隔（秒）
+        move_gap: 两次交换之间的目标间隔（秒）
+        oversleep: time.sleep 的超时误差，None 时自动校准
+    """
+
+    def __init__(self, click_gap: float = 0.05, move_gap: float = 0.05, oversleep: float | None = None):
+        self.click_gap = click_gap
+        self.move_gap = move_gap
+        self.oversleep = calibrate_sleep() if oversleep is None else oversleep
+
+    def wait_until(self, deadline: float) -> None:
+        """等待到 perf_counter() 达到 deadline：先睡到预计醒来时间，剩余部分忙等"""
+        remaining = deadline - time.perf_counter()
+        if remaining > self.oversleep + 0.001:
+            time.sleep(remaining - self.oversleep - 0.001)
+        while time.perf_counter() < deadline:
+            pass
+
+
+def load_timing(path: str = 'click_timing.json', click_gap: float = 0.05, move_gap: float = 0.05) -> ClickTiming:
+    """
+    读取 calibrate_input.py 实测得到的点击间隔；文件不存在时使用给定的默认值。
+
+    参数:
+        path: 校准结果 JSON 文件
+        click_gap, move_gap: 未校准时的默认间隔（秒）
+    """
+    if os.path.exists(path):
+        with open(path, encoding='utf-8') as f:
+            measured = json.load(f)
+        click_gap = measured['click_gap']
+        move_gap = measured['move_gap']
+    return ClickTiming(click_gap, move_gap)
+
+
+class InputBackend(ABC):
+    """输入后端基类，子类实现 click / move_to，需要时重写 swap 以合并调用"""
+
+    def __init__(self, timing: ClickTiming | None = None):
+        self.timing = timing or ClickTiming()
+
+    @abstractmethod
+    def click(self, x: int, y: int) -> None:
+        """在 (x, y) 点击一次左键"""
+
+    @abstractmethod
+    def move_to(self, x: int, y: int) -> None:
+        """把鼠标移动到 (x, y)"""
+
+    def swap(self, p1: tuple[int, int], p2: tuple[int, int]) -> None:
+        """依次点击 p1、p2 完成一次交换，返回时已满足与下一次交换的间隔"""
+        start = time.perf_counter()
+        self.click(*p1)
+        self.timing.wait_until(start + self.timing.click_gap)
+        second = time.perf_counter()
+        self.click(*p2)
+        self.timing.wait_until(second + self.timing.move_gap)
+
+
+class PyAutoGUIBackend(InputBackend):
+    """pyautogui 后端，关闭其自带的每次调用停顿（默认 0.1 秒），由 ClickTiming 控制间隔"""
+
+    def __init__(self, timing: ClickTiming | None = None):
+        super().__init__(timing)
+        import pyautogui
+        pyautogui.PAUSE = 0
+        pyautogui.FAILSAFE = True
+        self._pyautogui = pyautogui
+
+    def click(self, x: int, y: int) -> None:
+        try:
+            self._pyautogui.click(x=x, y=y)
+        except self._pyautogui.FailSafeException as e:
+            raise FailSafeError(str(e)) from e
+
+    def move_to(self, x: int, y: int) -> None:
+        try:
+            self._pyautogui.moveTo(x, y)
+        except self._pyautogui.FailSafeException as e:
+            raise FailSafeError(str(e)) from e
+
+
+class Win32Backend(InputBackend):
+    """
+    SendInput 后端：移动 + 按下 + 抬起作为一组输入一次提交，click_gap 为 0 时整个交换只调用一次 SendInput。
+    SendInput 不经过 pyautogui 的 FAILSAFE，这里在每次提交前自行检查鼠标是否位于主屏幕角落。
+    """
+
+    INPUT_MOUSE = 0
+    MOUSEEVENTF_MOVE = 0x0001
+    MOUSEEVENTF_LEFTDOWN = 0x0002
+    MOUSEEVENTF_LEFTUP = 0x0004
+    MOUSEEVENTF_VIRTUALDESK = 0x4000
+    MOUSEEVENTF_ABSOLUTE = 0x8000
+
+    def __init__(self, timing: ClickTiming | None = None):
+        super().__init__(timing)
+        import ctypes
+        from ctypes import wintypes
+
+        class MOUSEINPUT(ctypes.Structure):
+            _fields_ = [('dx', wintypes.LONG), ('dy', wintypes.LONG), ('mouseData', wintypes.DWORD),
+                        ('dwFlags', wintypes.DWORD), ('time', wintypes.DWORD), ('dwExtraInfo', ctypes.c_size_t)]
+
+        class INPUT(ctypes.Structure):
+            # 联合体中 MOUSEINPUT 之外的成员较短，这里只声明鼠标输入
+            _fields_ = [('type', wintypes.DWORD), ('mi', MOUSEINPUT)]
+
+        self._ctypes = ctypes
+        self._INPUT = INPUT
+        self._MOUSEINPUT = MOUSEINPUT
+        self._user32 = ctypes.windll.user32
+        # 虚拟桌面范围（多显示器），用于换算绝对坐标
+        self._vx = self._user32.GetSystemMetrics(76)
+        self._vy = self._user32.GetSystemMetrics(77)
+        self._vw = max(1, self._user32.GetSystemMetrics(78) - 1)
+        self._vh = max(1, self._user32.GetSystemMetrics(79) - 1)
+        self._point = wintypes.POINT()
+
+    def check_failsafe(self) -> None:
+        """鼠标位于主屏幕四个角之一时抛出 FailSafeError"""
+        self._user32.GetCursorPos(self._ctypes.byref(self._point))
+        w = self._user32.GetSystemMetrics(0)
+        h = self._user32.GetSystemMetrics(1)
+        if self._point.x in (0, w - 1) and self._point.y in (0, h - 1):
+            raise FailSafeError(f"鼠标位于屏幕角落 ({self._point.x}, {self._point.y})，已紧急停止")
+
+    def _events(self, x: int, y: int, buttons: bool) -> list:
+        dx = int((x - self._vx) * 65535 / self._vw)
+        dy = int((y - self._vy) * 65535 / self._vh)
+        move = self.MOUSEEVENTF_MOVE | self.MOUSEEVENTF_ABSOLUTE | self.MOUSEEVENTF_VIRTUALDESK
+        flags = [move, self.MOUSEEVENTF_LEFTDOWN, self.MOUSEEVENTF_LEFTUP] if buttons else [move]
+        return [self._INPUT(self.INPUT_MOUSE, self._MOUSEINPUT(dx, dy, 0, f, 0, 0)) for f in flags]
+
+    def _send(self, events: list) -> None:
+        array = (self._INPUT * len(events))(*events)
+        self._user32.SendInput(len(events), array, self._ctypes.sizeof(self._INPUT))
+
+    def click(self, x: int, y: int) -> None:
+        self.check_failsafe()
+        self._send(self._events(x, y, True))
+
+    def move_to(self, x: int, y: int) -> None:
+        self.check_failsafe()
+        self._send(self._events(x, y, False))
+
+    def swap(self, p1: tuple[int, int], p2: tuple[int, int]) -> None:
+        if self.timing.click_gap > 0:
+            super().swap(p1, p2)
+            return
+        # 两次点击合并为一次 SendInput
+        self.check_failsafe()
+        self._send(self._events(*p1, True) + self._events(*p2, True))
+        self.timing.wait_until(time.perf_counter() + self.timing.move_gap)
+
+
+class RecordingBackend(InputBackend):
+    """
+    不产生真实输入，只记录 (时间戳, 事件, x, y)。
+
+    参数:
+        timing: 点击时序参数
+        latency: 模拟每次调用的耗时（秒），用于估计真实后端的开销
+    """
+
+    def __init__(self, timing: ClickTiming | None = None, latency: float = 0.0):
+        super().__init__(timing)
+        self.latency = latency
+        self.events: list[tuple[float, str, int, int]] = []
+        self._lock = threading.Lock()
+
+    def _record(self, kind: str, x: int, y: int) -> None:
+        with self._lock:
+            self.events.append((time.perf_counter(), kind, x, y))
+        if self.latency:
+            self.timing.wait_until(time.perf_counter() + self.latency)
+
+    def click(self, x: int, y: int) -> None:
+        self._record('click', x, y)
+
+    def move_to(self, x: int, y: int) -> None:
+        self._record('move', x, y)
+
+    def clicks(self) -> list[tuple[float, int, int]]:
+        """返回全部点击事件 [(时间戳, x, y), ...]"""
+        with self._lock:
+            return [(t, x, y) for t, kind, x, y in self.events if kind == 'click']
+
+
+def create_backend(name: str = 'auto', timing: ClickTiming | None = None) -> InputBackend:
+    """
+    创建输入后端。
+
+    参数:
+        name: 'auto'（Windows 用 win32，否则 pyautogui）、'win32'、'pyautogui' 或 'recording'
+        timing: 点击时序参数，默认自动校准
+    """
+    if name == 'auto':
+        name = 'win32' if sys.platform == 'win32' else 'pyautogui'
+    if name == 'win32':
+        return Win32Backend(timing)
+    if name == 'pyautogui':
+        return PyAutoGUIBackend(timing)
+    if name == 'recording':
+        return RecordingBackend(timing)
+    raise ValueError(f"未知输入后端: {name}")
@@ -1,19 +1,57 @@
-from os import error
 import win32con, win32gui
-import pyautogui
 import time
 from pynput import keyboard
-from threading import Thread
+from threading import Lock, Thread
 import eliminate
 import recognize
+import speculate
+import session_trace
+import input_backend
+import sampling_profiler
+import standby
 import tkinter as tk
 import os, signal
+import queue
+import numpy as np
 # 全局控制变量
 running = False
 clicking = False  # 防止重复启动多个线程
 should_exit = False
+fail_safe_tripped = False  # 因鼠标移到屏幕角落而停止，按 Space 重新开始前保留红色提示
 target_coordinates = ((0, 0), (0, 0))
 error_label: tk.Label | None = None
+# 状态文字更新队列：工作线程只入队，由 Tk 主线程按 STATUS_INTERVAL_MS 节奏取出最新一条显示
+status_queue: queue.Queue = queue.Queue()
+STATUS_INTERVAL_MS = 50
+_last_status: tuple[str, str] | None = None
+_status_lock = Lock()  # 保护 _last_status 的比较与更新，多个线程都会提交状态
+MAX_MOVES_PER_FRAME = 3  # 每次截图最多执行的互不干扰交换数
+# 会话记录：设置环境变量 MATCH3_TRACE=文件路径 开启，MATCH3_TRACE_CROPS=1 同时保存棋盘截图
+TRACE_PATH = os.environ.get('MATCH3_TRACE')
+TRACE_CROPS = os.environ.get('MATCH3_TRACE_CROPS') == '1'
+recorder: session_trace.TraceRecorder | None = None
+# 求解器：MATCH3_SOLVER=crn 使用公共随机数求解（eliminate.evaluate_moves_crn），默认 independent
+SOLVER = os.environ.get('MATCH3_SOLVER', 'independent')
+SIMULATIONS = eliminate.SOLVER_SIMULATIONS[SOLVER]
+# 静态评估剪枝（independent 求解器）：MATCH3_PRUNE=N 只模拟前 N 个移动，
+# MATCH3_WEIGHTS=evaluator.py 拟合的 .npy 权重，未设置时为 evaluator.DEFAULT_WEIGHTS，在 main() 中读取
+PRUNE = int(os.environ['MATCH3_PRUNE']) if os.environ.get('MATCH3_PRUNE') else None
+WEIGHTS_PATH = os.environ.get('MATCH3_WEIGHTS')
+weights: np.ndarray | None = None
+# 鼠标输入后端：Windows 下使用 SendInput，点击间隔按截止时间调度。
+# 间隔取 calibrate_input.py 的实测结果（MATCH3_CLICK_TIMING，默认 click_timing.json），未校准时为 50ms/50ms。
+# 在 main() 中创建，导入本模块时不做 sleep 校准、也不加载 ctypes/pyautogui
+CLICK_TIMING_PATH = os.environ.get('MATCH3_CLICK_TIMING', 'click_timing.json')
+clicker: input_backend.InputBackend | None = None
+# F4 开关的采样分析器，未开启时没有开销
+profiler = sampling_profiler.SamplingProfiler(interval=0.005, output_dir='profiles')
+# F3 待命求解：设置环境变量 MATCH3_STANDBY=1 开启，后台持续为静止的棋盘准备好最佳移动
+STANDBY_ENABLED = os.environ.get('MATCH3_STANDBY') == '1'
+standby_solver: standby.StandbySolver | None = None
+# 鼠标全局共享：自动点击与 F3 的交换通过同一把锁串行执行，避免两次交换的点击互相穿插
+click_lock = Lock()
+# F3 单次移动执行期间持有，期间再按 F3（连按或按键自动重复）直接忽略
+single_move_lock = Lock()
 
 
 def transform_to_screen_coords(r, c, left, top, cell_size):
@@ -35,11 +73,36 @@ def transform_to_screen_coords(r, c, left, top, cell_size):
     return x, y
 
 
+def post_status(text: str, fg: str) -> None:
+    """从任意线程提交状态文字，与上一次提交相同则直接忽略，从不阻塞"""
+    global _last_status
+    status = (text, fg)
+    with _status_lock:
+        if status == _last_status:
+            return
+        _last_status = status
+        status_queue.put_nowait(status)
+
+
+def fail_safe_stop(error: Exception) -> None:
+    """鼠标被移到屏幕角落：暂停自动点击"""
+    global running, fail_safe_tripped
+    running = False
+    fail_safe_tripped = True
+    print(f"⛔ {error}")
+    post_status("鼠标移到屏幕角落，已紧急停止", 'red')
+
+
 def auto_click_loop():
     """自动点击循环"""
-    global running, clicking, should_exit, error_label
+    global running, clicking, should_exit, error_label, recorder
     print("💡 点击线程已启动，等待启动信号...")
+    speculator = speculate.SpeculativeSolver(MAX_MOVES_PER_FRAME, SIMULATIONS, SOLVER, PRUNE, weights)
+    if TRACE_PATH and recorder is None:
+        recorder = session_trace.TraceRecorder(TRACE_PATH, TRACE_CROPS)
+    recognizer = recognize.DiffRecognizer()  # 只重新识别像素变化过的方块
     while True:
+        frame_time = time.time()
         img, window_location = recognize.screenshot_window("《星际争霸II》")
         if not img or not window_location:
             print("\n没有找到窗口")
@@ -54,70 +117,129 @@ def auto_click_loop():
                 # 更新错误信息标签
                 width = right - left
                 height = bottom - top
-                error_label.config(text=f"不支持当前分辨率{width}x{height}, 支持的分辨率包括1080p、2K、4K。\n程序将在5秒后自动退出", fg='red')
+                post_status(f"不支持当前分辨率{width}x{height}, 支持的分辨率包括1080p、2K、4K。\n程序将在5秒后自动退出", 'red')
                 # 结束此函数，不再继续执
                 time.sleep(5)
+                close_recorder()
                 os.kill(os.getpid(), signal.SIGTERM)
             
         cell_size = (width) // 8  # 自动适配任意分辨率
-        mat = recognize.convert_image_to_mat(img)
-        best_move, best_elim, best_chain, total_moves = eliminate.find_best_move(mat, 1)
-        if running and best_move:
-            (r1, c1), (r2, c2) = best_move
-            x1, y1 = transform_to_screen_coords(r1, c1, left, top, cell_size)
-            x2, y2 = transform_to_screen_coords(r2, c2, left, top, cell_size)
-            print(f'🖱️ 执行点击: ({r1},{c1})->({r2},{c2})  屏幕({x1},{y1})<->({x2},{y2})')
-            print(f'预计消除方块: {best_elim}, 连锁: {best_chain}, 可移动方块数量: {total_moves}')
-            pyautogui.click(x=x1, y=y1)
-            time.sleep(0.05)  # 小延迟，避免太快
-            pyautogui.click(x=x2, y=y2)
-            # 控制点击频率（每秒约5次）
-            time.sleep(0.05)
-        else:
-            if error_label:
+        mat, _ = recognizer.update(img)
+        mean_r = recognizer.mean_r
+        # 优先复用上一帧动画期间推测求解的结果，一帧内规划多个互不干扰的交换，连续执行后再截图
+        plan = speculator.lookup(mat)
+        if plan is None:
+            plan = eliminate.plan_moves(mat, MAX_MOVES_PER_FRAME, SIMULATIONS, solver=SOLVER, prune=PRUNE, weights=weights)
+        trace = recorder  # F2 线程可能随时调用 close_recorder 把它置为 None
+        if trace and running:
+            trace.record(mat.copy(), mean_r.copy(), plan, img, frame_time)  # 只入队，不阻塞；识别结果会被原地更新，需复制
+        if running and plan:
+            # 点击之前就开始预测并求解下一帧，与点击和动画时间重叠
+            speculator.submit(mat, [move for move, _, _ in plan])
+            for ((r1, c1), (r2, c2)), best_elim, best_chain in plan:
                 if not running:
-                    error_label.config(text="已暂停", fg='yellow')
+                    speculator.cancel()  # 中途暂停，预测的棋盘不会出现
+                    break
+                x1, y1 = transform_to_screen_coords(r1, c1, left, top, cell_size)
+                x2, y2 = transform_to_screen_coords(r2, c2, left, top, cell_size)
+                print(f'🖱️ 执行点击: ({r1},{c1})->({r2},{c2})  屏幕({x1},{y1})<->({x2},{y2})')
+                print(f'预计消除方块: {best_elim}, 连锁: {best_chain}, 本帧移动数: {len(plan)}')
+                # 两次点击间隔 click_gap，返回时已与下一次交换间隔 move_gap
+                try:
+                    with click_lock:
+                        clicker.swap((x1, y1), (x2, y2))
+                except input_backend.FailSafeError as e:
+                    speculator.cancel()
+                    fail_safe_stop(e)
+                    break
+        else:
+            if not running and not fail_safe_tripped:
+                post_status("已暂停", 'yellow')
                     
             # 暂停状态，减少CPU占用
             time.sleep(0.1)
     
 
-def single_move():
-    """按 F3 只执行一次最优交换"""
+def close_recorder():
+    """写完排队中的会话记录并关闭文件，可重复调用"""
+    global recorder
+    current, recorder = recorder, None
+    if current is not None:
+        current.close()
+        print(f"会话记录已保存: {TRACE_PATH}（{current.written} 帧，丢弃 {current.dropped} 帧）")
+
+
+def capture_board():
+    """截图并识别，返回 (棋盘矩阵, 棋盘坐标)，找不到窗口时返回 None"""
     img, window_location = recognize.screenshot_window("《星际争霸II》")
     if not window_location or not img:
-        print("\n没有找到窗口")
-        return
+        return None
+    return recognize.convert_image_to_mat(img), window_location
+
+
+def solve_single(mat):
+    """按 SOLVER 求解单次最佳移动，返回值与 eliminate.find_best_move 一致"""
+    if SOLVER == 'crn':
+        return eliminate.find_best_move_crn(mat, SIMULATIONS, min(8, SIMULATIONS))
+    return eliminate.find_best_move(mat, SIMULATIONS, prune=PRUNE, weights=weights)
+
+
+def execute_single(best_move, window_location, best_elim, best_chain, total_moves):
+    """点击执行一次交换"""
     left, top, right, bottom = window_location
     cell_size = (right - left) // 8
-    mat = recognize.convert_image_to_mat(img)
-    best_move, best_elim, best_chain, total_moves = eliminate.find_best_move(mat, 1)
-    if not best_move:
-        print("🚫 棋盘无可用移动")
-        return
-
     (r1, c1), (r2, c2) = best_move
     x1, y1 = transform_to_screen_coords(r1, c1, left, top, cell_size)
     x2, y2 = transform_to_screen_coords(r2, c2, left, top, cell_size)
 
     print(f'🔧 F3 单次点击: ({r1},{c1})<->({r2},{c2})  屏幕({x1},{y1})<->({x2},{y2})')
     print(f'预计消除方块: {best_elim}, 连锁: {best_chain}, 可移动方块数量: {total_moves}')
-    pyautogui.click(x1, y1)
-    time.sleep(0.05)
-    pyautogui.click(x2, y2)
+    try:
+        with click_lock:
+            clicker.swap((x1, y1), (x2, y2))
+    except input_backend.FailSafeError as e:
+        fail_safe_stop(e)
+
+
+def single_move():
+    """按 F3 只执行一次最优交换"""
+    # 待命结果可用时只需确认棋盘未变化，省去求解
+    standby_move = standby_solver.take() if standby_solver else None
+    frame = capture_board()
+    if frame is None:
+        print("\n没有找到窗口")
+        return
+    mat, window_location = frame
+    if standby_move is not None and np.array_equal(mat, standby_move.board):
+        execute_single(standby_move.move, window_location, standby_move.elim, standby_move.chain, standby_move.total_moves)
+        return
+
+    best_move, best_elim, best_chain, total_moves = solve_single(mat)
+    if not best_move:
+        print("🚫 棋盘无可用移动")
+        return
+    execute_single(best_move, window_location, best_elim, best_chain, total_moves)
+
+
+def single_move_once():
+    """在 F3 线程中执行 single_move，结束后释放 single_move_lock"""
+    try:
+        single_move()
+    finally:
+        single_move_lock.release()
 
 
 def on_press(key):
     """键盘监听回调函数"""
-    global running, clicking, should_exit
+    global running, clicking, should_exit, fail_safe_tripped
 
     try:
         if key == keyboard.Key.space:
             if not running:
                 running = True
+                fail_safe_tripped = False
                 print("自动点击已启动 (Space)")
-                if error_label:
-                    error_label.config(text="正在运行...", fg='cyan') # 或 'blue', 'lightgreen'
+                post_status("正在运行...", 'cyan')  # 或 'blue', 'lightgreen'
                 if not clicking:
                     start_clicking_thread()
 
@@ -125,8 +247,7 @@ def on_press(key):
             if running:
                 running = False
                 print("自动点击已暂停 (X/C/V/B)")
-                if error_label:
-                    error_label.config(text="已暂停", fg='yellow')
+                post_status("已暂停", 'yellow')
                 time.sleep(0.3)  # 等待半秒，确保先前鼠标移动完成
                 # 2K 母版尺寸 & 硬编码偏移
                 BASE_W, BASE_H = 2560, 1440
@@ -144,15 +265,30 @@ def on_press(key):
                     sx, sy = cw / BASE_W, ch / BASE_H
                     target_x = int(BASE_X * sx)
                     target_y = int(BASE_Y * sy)
-                    pyautogui.moveTo(target_x, target_y)
+                    if clicker:
+                        try:
+                            clicker.move_to(target_x, target_y)
+                        except input_backend.FailSafeError as e:
+                            fail_safe_stop(e)
 
         elif key == keyboard.Key.f2:
             import os, signal
             should_exit = True
+            close_recorder()  # SIGTERM 直接结束进程，先写完排队的会话记录
             os.kill(os.getpid(), signal.SIGTERM)  # 立即结束自己
             print("自动点击已结束 (F2)")
         elif key == keyboard.Key.f3:  # ← 新增
-            single_move()
+            # 放到独立线程执行，不阻塞其他热键；上一次尚未结束时忽略本次按键
+            if single_move_lock.acquire(blocking=False):
+                Thread(target=single_move_once, name='single-move', daemon=True).start()
+        elif key == keyboard.Key.f4:
+            path = profiler.toggle()
+            if path is None:
+                print("采样分析已开始 (F4)")
+            else:
+                print(f"采样分析已结束，共 {profiler.samples} 次采样，结果: {path}")
+                for func, count in profiler.top(5):
+                    print(f"  {count:>6}  {func}")
     except AttributeError:
         pass
 
@@ -162,16 +298,22 @@ def start_clicking_thread():
     global clicking
     if not clicking:
         clicking = True
-        thread = Thread(target=auto_click_loop, daemon=True)
+        thread = Thread(target=auto_click_loop, name='click-loop', daemon=True)
         thread.start()
 
 
 def main():
-    global error_label
+    global error_label, standby_solver, clicker, weights
+    clicker = input_backend.create_backend(timing=input_backend.load_timing(CLICK_TIMING_PATH))
+    print(f"点击间隔 {clicker.timing.click_gap * 1000:.1f}ms / 交换间隔 {clicker.timing.move_gap * 1000:.1f}ms")
+    if WEIGHTS_PATH:
+        import evaluator  # 只有使用拟合权重时才需要
+        weights = evaluator.load_weights(WEIGHTS_PATH)
+        print(f"静态评估权重: {WEIGHTS_PATH}")
     # -------------------- 窗口本体 --------------------
     root = tk.Tk()
     root.title('')
-    root.geometry('300x200+100+400')  # 初始左上角
+    root.geometry('300x230+100+400')  # 初始左上角
     root.wm_attributes('-topmost', 1)  # 置顶
     root.wm_attributes('-alpha', 0.85)  # 半透明
     root.overrideredirect(True)  # 去掉标题栏/关闭按钮
@@ -204,8 +346,27 @@ def main():
         wraplength=280  # 自动换行宽度
     )
     error_label.pack(fill='x', expand=False, padx=5, pady=(5, 0))
+
+    # -------------------- 状态更新（仅在主线程访问 Tk） --------------------
+    shown = (error_label.cget('text'), error_label.cget('fg'))
+
+    def drain_status():
+        """取出队列中的全部更新，只显示最新一条，内容未变化时不刷新"""
+        nonlocal shown
+        latest = None
+        while True:
+            try:
+                latest = status_queue.get_nowait()
+            except queue.Empty:
+                break
+        if latest is not None and latest != shown and error_label:
+            error_label.config(text=latest[0], fg=latest[1])
+            shown = latest
+        root.after(STATUS_INTERVAL_MS, drain_status)
+
+    root.after(STATUS_INTERVAL_MS, drain_status)
     # -------------------- 按键说明 --------------------
-    lines = ['Space  开始自动点击', 'X/C/V/B/ESC  暂停', 'F3     执行一次移动', 'F2     退出程序']
+    lines = ['Space  开始自动点击', 'X/C/V/B/ESC  暂停', 'F3     执行一次移动', 'F4     开始/结束采样分析', 'F2     退出程序']
     for txt in lines:
         tk.Label(root, text=txt, fg='white', bg='#303030', anchor='w', font=('Consolas', 10)).pack(fill='x', padx=10, pady=3)
 
@@ -214,10 +375,18 @@ def main():
     print("按 X/C/V/B/ESC暂停自动点击")
     print("按 F2 退出程序")
     print("按 F3 执行一次单次移动")
+    print("按 F4 开始/结束采样分析")
     print("按 Ctrl+C 退出程序（终端）")
 
+    # -------------------- F3 待命求解 --------------------
+    if STANDBY_ENABLED:
+        standby_solver = standby.StandbySolver(capture_board, solve_single,
+                                               active=lambda: not running)
+        standby_solver.start()
+
     # -------------------- 键盘监听放后台 --------------------
     listener = keyboard.Listener(on_press=on_press, daemon=True)
+    listener.name = 'keyboard-listener'
     listener.start()
 
     # -------------------- 主线程跑 GUI --------------------
@@ -232,6 +401,7 @@ def main():
             time.sleep(0.01)
     except KeyboardInterrupt:
         print("\n 程序已退出")
+    close_recorder()
 
 
 if __name__ == "__main__":
@@ -7,8 +7,8 @@ import os
 import numpy as np
 import win32gui, win32ui, win32con
 import ctypes
+from itertools import chain
 from PIL import Image
-import matplotlib.pyplot as plt
 from typing import Tuple
 
 # 启用 DPI 感知（Windows 10 及以上）
@@ -37,6 +37,8 @@ THRESHOLD = 3
 # mean=[63, 201, 139, 146, 13, 120]
 #根据以上数据计算得到：
 TEMPLATE_R = np.array([201, 146, 63, 139, 13, 120])
+# 方块模板图片目录（按模块位置解析，不依赖当前工作目录）
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'template')
 
 
 # [201, 62, 14, 144, 139, 120]
@@ -68,31 +70,31 @@ def get_resolution(hwnd) -> Tuple[int, int, int, int]:
     bottom = top + rect[3]
     return left, top, right, bottom
 
-def screenshot_window(title_keyword: str = "《星际争霸II》", debug=False) -> Tuple[Image.Image | None, Tuple[int, int, int, int] | None]:
-    """截取指定标题关键字的窗口截图
-    
-    参数:
-        title_keyword: 窗口标题关键字，默认 "《星际争霸II》"
-        debug: 是否打印调试信息，默认 False
-        
-    返回:
-        截图的PIL Image对象，若未找到窗口则返回None
-        棋盘坐标(left, top, right, bottom)，若未找到窗口则返回None
-    """
-    # 获取实际分辨率
-    hwnd= get_hwnd(title_keyword)
-    if not hwnd:
-        return None, None
+def find_hwnds(title_keyword: str = "《星际争霸II》") -> list[int]:
+    """获取所有标题包含关键字的可见窗口句柄"""
+    hwnds = []
+
+    def callback(hwnd, _):
+        if win32gui.IsWindowVisible(hwnd) and title_keyword in win32gui.GetWindowText(hwnd):
+            hwnds.append(hwnd)
+        return True
+
+    win32gui.EnumWindows(callback, None)
+    return hwnds
+
+
+def board_region(hwnd) -> Tuple[int, int, int, int] | None:
+    """按客户区尺寸计算棋盘区域（客户区坐标），客户区尺寸为 0 时返回 None"""
     left, top, right, bottom = get_resolution(hwnd)
     cw, ch = right - left, bottom - top
     if cw == 0 or ch == 0:
-        print("客户区尺寸为 0")
-        return None, None
-    # 棋盘坐标
-    left = int(REL_L * cw)
-    top = int(REL_T * ch)
-    right = int(REL_R * cw)
-    bottom = int(REL_B * ch)
+        return None
+    return int(REL_L * cw), int(REL_T * ch), int(REL_R * cw), int(REL_B * ch)
+
+
+def capture_region(hwnd, region: Tuple[int, int, int, int]) -> Image.Image:
+    """截取窗口中的指定区域（窗口即使被遮挡也能截）"""
+    left, top, right, bottom = region
     width = right - left
     height = bottom - top
 
@@ -115,14 +117,42 @@ def screenshot_window(title_keyword: str = "《星际争霸II》", debug=False)
     saveDC.DeleteDC()
     mfcDC.DeleteDC()
     win32gui.ReleaseDC(hwnd, hwndDC)
+    return img
+
+
+def screenshot_window(title_keyword: str = "《星际争霸II》", debug=False) -> Tuple[Image.Image | None, Tuple[int, int, int, int] | None]:
+    """截取指定标题关键字的窗口截图
+    
+    参数:
+        title_keyword: 窗口标题关键字，默认 "《星际争霸II》"
+        debug: 是否打印调试信息，默认 False
+        
+    返回:
+        截图的PIL Image对象，若未找到窗口则返回None
+        棋盘坐标(left, top, right, bottom)，若未找到窗口则返回None
+    """
+    # 获取实际分辨率
+    hwnd= get_hwnd(title_keyword)
+    if not hwnd:
+        return None, None
+    region = board_region(hwnd)
+    if region is None:
+        print("客户区尺寸为 0")
+        return None, None
+    img = capture_region(hwnd, region)
     if debug:
+        left, top, right, bottom = get_resolution(hwnd)
+        cw, ch = right - left, bottom - top
+        left, top, right, bottom = region
+        width = right - left
+        height = bottom - top
         print(f"游戏窗口 {cw}×{ch}")
         print(f"棋盘尺寸 {width}×{height}")
         print(f"┌{left:^5},{top:^5}------┐")
         print(f"│{width:>8}×{height:<8}│")
         print(f"└------{right:^5},{bottom:^5}┘")
 
-    return img, (left, top, right, bottom)
+    return img, region
 
 
 def classify_color(color: int) -> str:
@@ -155,6 +185,19 @@ def convert_image_to_mat(img: Image.Image) -> np.ndarray:
     返回:
         np.ndarray: 8×8 int 矩阵，元素为 COLOR_IDS 定义的颜色编号。
     """
+    return classify_means(cell_means(img))
+
+
+def cell_means(img: Image.Image) -> np.ndarray:
+    """
+    计算每个方块中心 40 % 区域的 R 通道均值。
+
+    参数:
+        img (Image.Image): 棋盘截图，尺寸为 8 的倍数。
+
+    返回:
+        np.ndarray: 8×8 float 矩阵。
+    """
     img_np = np.asarray(img)
     h, w = img_np.shape[:2]
     # 0. 单个方块尺寸 & 中心 40 % 区域
@@ -168,9 +211,20 @@ def convert_image_to_mat(img: Image.Image) -> np.ndarray:
     img_r = img_np[:, :, 2]
     view = img_r.reshape(8, block_h, 8, block_w).transpose(0, 2, 1, 3)  # (8,8,block_h,block_w)
     center = view[:, :, y0:y1, x0:x1]  # 中心 40 %
-    mean_r = center.mean(axis=(2, 3))  # (8,8)
+    return center.mean(axis=(2, 3))  # (8,8)
+
 
-    # 3. 逐个送进 judge 得到颜色编号
+def classify_means(mean_r: np.ndarray) -> np.ndarray:
+    """
+    把 cell_means 得到的均值逐个归类为颜色编号。
+
+    参数:
+        mean_r (np.ndarray): 8×8 R 通道均值。
+
+    返回:
+        np.ndarray: 8×8 int 矩阵，元素为 COLOR_IDS 定义的颜色编号。
+    """
+    # 逐个送进 judge 得到颜色编号
     board = np.zeros((8, 8), dtype=int)
     for i in range(8):
         for j in range(8):
@@ -179,6 +233,101 @@ def convert_image_to_mat(img: Image.Image) -> np.ndarray:
     return board
 
 
+# ------------------- 5. 差分识别 -------------------
+class DiffRecognizer:
+    """
+    差分识别：保存上一帧每个方块的稀疏采样签名，只对像素发生变化的方块重新求均值并归类，
+    其余方块沿用上一帧的结果。
+
+    每个方块在中心 40 % 区域内取 probes×probes 个像素（三个通道）作为签名，
+    任一采样点的任一通道变化超过 tolerance 即视为该方块已变化。
+    只比较 R 通道不够：bone 与 purple 的 R 均值只差 7，纯色变化可能落在容差之内。
+    分辨率变化、首帧以及每隔 refresh_every 帧会完整识别一次，避免误差累积。
+
+    参数:
+        probes: 每个方块每个方向的采样点数
+        tolerance: 采样点允许的像素差
+        refresh_every: 完整识别的帧间隔，0 表示只在首帧和分辨率变化时完整识别
+    """
+
+    FULL_THRESHOLD = 32  # 变化方块超过该数量时整张求均值，而不是逐个裁剪
+
+    def __init__(self, probes: int = 4, tolerance: int = 8, refresh_every: int = 100):
+        self.probes = probes
+        self.tolerance = tolerance
+        self.refresh_every = refresh_every
+        self.board: np.ndarray | None = None  # 8×8 颜色编号，原地更新
+        self.mean_r: np.ndarray | None = None  # 8×8 R 通道均值，原地更新
+        self._signature: np.ndarray | None = None
+        self._size: tuple | None = None
+        self._points: list[tuple[int, int]] = []  # 采样点 (x, y)，按行优先排列
+        self._frames = 0
+
+    def _setup(self, w: int, h: int) -> None:
+        block_h, block_w = h // 8, w // 8
+        margin = int(block_h * 0.3)
+        # 与 cell_means 相同的中心区域内均匀取点
+        offsets_y = np.linspace(margin, block_h - margin - 1, self.probes).astype(int)
+        offsets_x = np.linspace(margin, block_w - margin - 1, self.probes).astype(int)
+        probe_y = (np.arange(8)[:, None] * block_h + offsets_y).ravel().tolist()
+        probe_x = (np.arange(8)[:, None] * block_w + offsets_x).ravel().tolist()
+        self._points = [(x, y) for y in probe_y for x in probe_x]
+        self._size = (w, h)
+
+    def _probe(self, img: Image.Image) -> np.ndarray:
+        # 通过像素访问对象逐点读取，避免每帧把整张截图转换为数组（4K 下这一步就占完整识别的大部分时间）
+        k = self.probes
+        bands = len(img.getbands())
+        pixels = img.load()
+        samples = np.fromiter(chain.from_iterable(map(pixels.__getitem__, self._points)),
+                              dtype=np.int16, count=len(self._points) * bands)
+        return samples.reshape(8, k, 8, k, bands)[..., :3].transpose(0, 2, 1, 3, 4)  # (8,8,k,k,3)
+
+    def update(self, img: Image.Image) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        识别新的一帧。
+
+        参数:
+            img (Image.Image): 棋盘截图，尺寸为 8 的倍数。
+
+        返回:
+            board: 8×8 颜色编号矩阵（内部数组，原地更新；需要保留时请 copy）
+            changed: 8×8 bool 矩阵，True 表示该方块本帧重新识别过
+        """
+        if self._size != img.size:
+            self._setup(*img.size)
+            self.board = None
+        signature = self._probe(img)
+        self._frames += 1
+
+        full = self.board is None or (self.refresh_every and self._frames % self.refresh_every == 0)
+        if full:
+            self.mean_r = cell_means(img)
+            self.board = classify_means(self.mean_r)
+            self._signature = signature
+            return self.board, np.ones((8, 8), dtype=bool)
+
+        changed = (np.abs(signature - self._signature) > self.tolerance).any(axis=(2, 3, 4))
+        if changed.sum() > self.FULL_THRESHOLD:
+            # 大部分方块都变了：逐个裁剪不如整张求均值快
+            self.mean_r[:] = cell_means(img)
+            for i, j in zip(*np.nonzero(changed)):
+                self.board[i, j] = COLOR_IDS[classify_color(int(self.mean_r[i, j]))]
+            self._signature[changed] = signature[changed]
+        elif changed.any():
+            w, h = self._size
+            block_h, block_w = h // 8, w // 8
+            margin = int(block_h * 0.3)
+            for i, j in zip(*np.nonzero(changed)):
+                # 只裁剪该方块的中心 40 % 区域
+                x, y = j * block_w, i * block_h
+                center = np.asarray(img.crop((x + margin, y + margin, x + block_w - margin, y + block_h - margin)))
+                self.mean_r[i, j] = center[:, :, 2].mean()
+                self.board[i, j] = COLOR_IDS[classify_color(int(self.mean_r[i, j]))]
+            self._signature[changed] = signature[changed]
+        return self.board, changed
+
+
 def reconstruct_board_image(matrix: np.ndarray, block: int) -> Image.Image:
     """
     根据 8×8 数值矩阵重建彩色棋盘，尺寸与截图像素 1:1。
@@ -200,7 +349,7 @@ def reconstruct_board_image(matrix: np.ndarray, block: int) -> Image.Image:
             val = matrix[i, j]
             if val in color_map:
                 try:
-                    tile = Image.open(os.path.join('template', color_map[val])).convert('RGB')
+                    tile = Image.open(os.path.join(TEMPLATE_DIR, color_map[val])).convert('RGB')
                     # 统一缩放到当前 block 大小
                     tile = tile.resize((block, block), Image.Resampling.LANCZOS)
                     board_img.paste(tile, (j * block, i * block))
@@ -220,6 +369,8 @@ def show_image(img: Image.Image, title: str = "Image", figsize=(8, 8), cmap=None
         figsize: 图像显示大小
         cmap: 颜色映射（如灰度图用 'gray'）
     """
+    import matplotlib.pyplot as plt  # 仅调试显示使用，首次调用时才加载
+
     plt.figure(figsize=figsize)
     plt.imshow(img, cmap=cmap)
     plt.title(title, fontsize=14)
@@ -230,6 +381,8 @@ def show_image(img: Image.Image, title: str = "Image", figsize=(8, 8), cmap=None
 
 if __name__ == "__main__":
     # 若直接运行此文件，则为调试模式，显示识别结果
+    import matplotlib.pyplot as plt
+
     img, _ = screenshot_window("《星际争霸II》", True)
     if img:
         mat = convert_image_to_mat(img)
@@ -0,0 +1,93 @@
+"""
+统计采样分析器
+在后台线程中定时读取所有线程的调用栈（sys._current_frames），按"线程;函数;...;函数"聚合计数，
+输出 flamegraph.pl / speedscope 可直接读取的 collapsed-stack 文本。
+未启动时没有任何开销；启动后开销只取决于采样间隔，不需要在 cProfile 下重启程序。
+"""
+import os
+import sys
+import threading
+import time
+from collections import Counter
+
+
+class SamplingProfiler:
+    """
+    参数:
+        interval: 采样间隔（秒）
+        output_dir: 结果文件目录
+    """
+
+    def __init__(self, interval: float = 0.005, output_dir: str = 'profiles'):
+        self.interval = interval
+        self.output_dir = output_dir
+        self.samples = 0
+        self._stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._started_at = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        """开始采样，已在运行时忽略"""
+        if self._thread is not None:
+            return
+        self._stacks = Counter()
+        self.samples = 0
+        self._stop.clear()
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str | None:
+        """停止采样并写出结果，返回文件路径；未在运行时返回 None"""
+        if self._thread is None:
+            return None
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        return self.dump()
+
+    def toggle(self) -> str | None:
+        """未运行则启动（返回 None），运行中则停止并返回结果文件路径"""
+        if self.running:
+            return self.stop()
+        self.start()
+        return None
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    # 用函数定义所在行标识函数，同一调用路径不会因执行到不同行被拆成多个栈
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+
+    def dump(self) -> str:
+        """把当前聚合结果写为 collapsed-stack 文件，文件名带启动时间戳"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(self._started_at))
+        path = os.path.join(self.output_dir, f'profile_{stamp}.collapsed')
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self._stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        return path
+
+    def top(self, n: int = 10) -> list[tuple[str, int]]:
+        """按自身采样数（栈顶）排序的前 n 个函数"""
+        leaf = Counter()
+        for stack, count in self._stacks.items():
+            leaf[stack.rsplit(';', 1)[-1]] += count
+        return leaf.most_common(n)
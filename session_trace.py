@@ -0,0 +1,211 @@
+"""
+自动运行会话记录
+每帧写入一条定长二进制记录：时间戳、识别出的 8×8 棋盘（64 字节）、每格 R 通道均值、
+本帧执行的移动及其预计消除数 / 连锁轮数。可选把原始棋盘截图追加到旁边的 .crops 文件。
+记录文件可以直接 np.memmap 读取，无需逐条解析。
+
+写入在后台线程中完成，record() 只把数据放入队列，不会阻塞点击循环；队列条数或待写字节数
+（保存截图时每帧可达数 MB）超过上限时丢弃并计数。
+
+用法示例:
+    python session_trace.py session.m3t
+    python session_trace.py session.m3t --export-boards boards.npy
+"""
+import argparse
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+MAGIC = b'M3TRACE1'
+HEADER_SIZE = 16  # MAGIC(8) + 记录长度 uint32 + 保留 uint32
+MAX_PLAN = 4  # 每条记录最多保存的移动数
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),                 # time.time()
+    ('board', 'u1', (8, 8)),              # COLOR_IDS 颜色编号
+    ('mean_r', '<f4', (8, 8)),            # recognize.cell_means
+    ('n_moves', 'u1'),                    # 本帧执行的移动数
+    ('moves', 'i1', (MAX_PLAN, 4)),       # (r1, c1, r2, c2)，未使用为 -1
+    ('elim', '<f4', (MAX_PLAN,)),         # 预计消除数
+    ('chain', '<f4', (MAX_PLAN,)),        # 预计连锁轮数
+    ('crop_offset', '<i8'),               # .crops 文件中的字节偏移，-1 表示未保存
+    ('crop_height', '<u2'),
+    ('crop_width', '<u2'),
+])
+
+
+def _header() -> bytes:
+    return MAGIC + np.array([RECORD_DTYPE.itemsize, 0], dtype='<u4').tobytes()
+
+
+def _check_header(data: bytes, path: str) -> None:
+    if len(data) < HEADER_SIZE or data[:8] != MAGIC:
+        raise ValueError(f"不是会话记录文件: {path}")
+    size = int(np.frombuffer(data[8:12], dtype='<u4')[0])
+    if size != RECORD_DTYPE.itemsize:
+        raise ValueError(f"记录长度不匹配: 文件 {size}，当前版本 {RECORD_DTYPE.itemsize}")
+
+
+def _item_bytes(img) -> int:
+    """一条排队记录占用的内存字节数：定长记录加截图（PIL 的 RGB 图像每像素占 4 字节）"""
+    return RECORD_DTYPE.itemsize + (img.size[0] * img.size[1] * 4 if img is not None else 0)
+
+
+class TraceRecorder:
+    """
+    后台线程写入会话记录，文件已存在时追加。
+
+    参数:
+        path: 记录文件路径
+        record_crops: 是否同时保存原始棋盘截图（写入 path + '.crops'）
+        max_queue: 队列长度上限，写入跟不上时丢弃新记录
+        max_bytes: 队列中待写入的字节数上限（记录加截图），写入跟不上时丢弃新记录
+    """
+
+    def __init__(self, path: str, record_crops: bool = False, max_queue: int = 1024, max_bytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.record_crops = record_crops
+        self.max_bytes = max_bytes
+        self.dropped = 0
+        self.written = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._pending_bytes = 0
+        self._bytes_lock = threading.Lock()
+
+        exists = os.path.exists(path) and os.path.getsize(path) > 0
+        if exists:
+            with open(path, 'rb') as f:
+                _check_header(f.read(HEADER_SIZE), path)
+        self._file = open(path, 'ab')
+        if not exists:
+            self._file.write(_header())
+        self._crops = open(path + '.crops', 'ab') if record_crops else None
+
+        self._thread = threading.Thread(target=self._run, name='trace-writer', daemon=True)
+        self._thread.start()
+
+    def record(self, board: np.ndarray, mean_r: np.ndarray, plan: list, img=None, timestamp: float | None = None) -> None:
+        """
+        提交一帧记录，立即返回。
+
+        参数:
+            board: 8×8 颜色编号矩阵
+            mean_r: 8×8 R 通道均值
+            plan: [(((r1, c1), (r2, c2)), elim, chain), ...]，超过 MAX_PLAN 的部分不保存
+            img: 可选的棋盘截图（PIL Image），仅在 record_crops 时保存
+            timestamp: 截图时间，默认当前时间
+        """
+        img = img if self.record_crops else None
+        size = _item_bytes(img)
+        with self._bytes_lock:
+            if self._pending_bytes + size > self.max_bytes:
+                self.dropped += 1
+                return
+            self._pending_bytes += size
+        try:
+            self._queue.put_nowait((time.time() if timestamp is None else timestamp, board, mean_r, plan, img))
+        except queue.Full:
+            self._release(size)
+            self.dropped += 1
+
+    def _release(self, size: int) -> None:
+        with self._bytes_lock:
+            self._pending_bytes -= size
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch = []
+            while item is not None:
+                batch.append(item)
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            if item is None:
+                return
+
+    def _write(self, batch: list) -> None:
+        records = np.zeros(len(batch), dtype=RECORD_DTYPE)
+        records['moves'] = -1
+        records['crop_offset'] = -1
+        for k, (timestamp, board, mean_r, plan, img) in enumerate(batch):
+            rec = records[k]
+            rec['timestamp'] = timestamp
+            rec['board'] = board
+            rec['mean_r'] = mean_r
+            plan = plan[:MAX_PLAN]
+            rec['n_moves'] = len(plan)
+            for m, (((r1, c1), (r2, c2)), elim, chain) in enumerate(plan):
+                rec['moves'][m] = (r1, c1, r2, c2)
+                rec['elim'][m] = elim
+                rec['chain'][m] = chain
+            if img is not None and self._crops is not None:
+                rec['crop_offset'] = self._crops.tell()
+                rec['crop_width'], rec['crop_height'] = img.size
+                self._crops.write(img.convert('RGB').tobytes())
+        self._file.write(records.tobytes())
+        self._file.flush()
+        if self._crops is not None:
+            self._crops.flush()
+        self.written += len(batch)
+        self._release(sum(_item_bytes(item[4]) for item in batch))
+
+    def close(self) -> None:
+        """写完队列中剩余的记录并关闭文件"""
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        if self._crops is not None:
+            self._crops.close()
+
+
+def open_trace(path: str) -> np.ndarray:
+    """以只读 memmap 打开记录文件，返回 RECORD_DTYPE 结构化数组"""
+    with open(path, 'rb') as f:
+        _check_header(f.read(HEADER_SIZE), path)
+    count = (os.path.getsize(path) - HEADER_SIZE) // RECORD_DTYPE.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+
+
+def read_crop(path: str, record) -> np.ndarray | None:
+    """读取记录对应的棋盘截图，返回 (h, w, 3) uint8 数组，未保存时返回 None"""
+    offset = int(record['crop_offset'])
+    if offset < 0:
+        return None
+    h, w = int(record['crop_height']), int(record['crop_width'])
+    return np.memmap(path + '.crops', dtype=np.uint8, mode='r', offset=offset, shape=(h, w, 3))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="查看会话记录")
+    parser.add_argument('path', help="记录文件")
+    parser.add_argument('--export-boards', help="把所有棋盘导出为 (N, 8, 8) .npy，可供 batch_solve.py / evaluator.py 使用")
+    args = parser.parse_args(argv)
+
+    records = open_trace(args.path)
+    print(f"记录数: {len(records)}")
+    if len(records) == 0:
+        return
+    duration = float(records['timestamp'][-1] - records['timestamp'][0])
+    n_moves = records['n_moves'].astype(int)
+    print(f"时长: {duration:.1f}s  平均帧率: {len(records) / duration if duration > 0 else 0:.1f} 帧/秒")
+    print(f"移动数: {n_moves.sum()}  每帧平均: {n_moves.mean():.2f}  无移动帧: {(n_moves == 0).sum()}")
+    played = records['elim'][:, 0][n_moves > 0]
+    if len(played):
+        print(f"首个移动平均预计消除: {played.mean():.1f}  连锁: {records['chain'][:, 0][n_moves > 0].mean():.2f}")
+    print(f"含未识别方块的帧: {(records['board'] == 7).any(axis=(1, 2)).sum()}")
+    if args.export_boards:
+        np.save(args.export_boards, np.asarray(records['board']))
+        print(f"棋盘已导出: {args.export_boards}")
+
+
+if __name__ == "__main__":
+    main()
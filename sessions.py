@@ -0,0 +1,316 @@
+"""
+多窗口会话管理
+一个进程同时驱动多个游戏客户端：找出所有标题匹配的窗口，每个窗口一个独立的
+截图 → 识别 → 点击 线程并缓存自己的棋盘区域；求解统一交给共享的进程池，
+按窗口轮转调度，保证某个窗口不会占满求解资源。定期打印每个窗口的吞吐与延迟。
+
+鼠标是全局共享的，各窗口的点击通过锁串行执行，窗口之间不能互相遮挡。
+启动后处于暂停状态，热键与 main.py 一致：Space 开始，X/C/V/B/ESC 暂停，F2 退出；
+鼠标移到屏幕角落时全部暂停（input_backend.FailSafeError）。
+
+用法示例:
+    python sessions.py --workers 4
+"""
+import argparse
+import math
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+
+from pynput import keyboard
+
+import eliminate
+import input_backend
+import recognize
+
+TITLE_KEYWORD = "《星际争霸II》"
+# 点击间隔与 main.py 读取同一个校准文件（MATCH3_CLICK_TIMING，默认 click_timing.json）
+CLICK_TIMING_PATH = os.environ.get('MATCH3_CLICK_TIMING', 'click_timing.json')
+
+
+class FairScheduler:
+    """
+    把任务按会话轮转提交到共享进程池。
+    同时在池中执行的任务数不超过 workers，空出位置时依次从下一个有待办任务的会话中取一个。
+    """
+
+    def __init__(self, workers: int):
+        self._pool = ProcessPoolExecutor(max_workers=workers)
+        self._slots = threading.Semaphore(workers)
+        self._queues: dict[int, deque] = {}
+        self._order: deque[int] = deque()  # 轮转顺序
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._dispatch, name='solver-dispatch', daemon=True)
+        self._thread.start()
+
+    def submit(self, session_id: int, fn, *args) -> Future:
+        """提交任务，返回在任务完成时给出结果的 Future"""
+        result: Future = Future()
+        with self._cond:
+            if session_id not in self._queues:
+                self._queues[session_id] = deque()
+                self._order.append(session_id)
+            self._queues[session_id].append((result, fn, args))
+            self._cond.notify()
+        return result
+
+    def remove(self, session_id: int) -> None:
+        """移除会话，丢弃其尚未开始的任务"""
+        with self._cond:
+            for result, _, _ in self._queues.pop(session_id, ()):
+                result.cancel()
+            if session_id in self._order:
+                self._order.remove(session_id)
+
+    def _next(self):
+        for _ in range(len(self._order)):
+            session_id = self._order[0]
+            self._order.rotate(-1)
+            if self._queues[session_id]:
+                return self._queues[session_id].popleft()
+        return None
+
+    def _dispatch(self) -> None:
+        while True:
+            self._slots.acquire()
+            with self._cond:
+                task = self._next()
+                while task is None and not self._closed:
+                    self._cond.wait()
+                    task = self._next()
+                if task is None:
+                    return
+            result, fn, args = task
+            if not result.set_running_or_notify_cancel():
+                self._slots.release()
+                continue
+            try:
+                future = self._pool.submit(fn, *args)
+            except RuntimeError as e:  # 进程池已关闭
+                self._slots.release()
+                result.set_exception(CancelledError(str(e)))
+                continue
+            future.add_done_callback(lambda f, r=result: self._done(f, r))
+
+    def _done(self, future: Future, result: Future) -> None:
+        self._slots.release()
+        if future.cancelled():
+            # shutdown(cancel_futures=True) 取消了尚未执行的任务；代理 Future 已处于运行状态无法 cancel，
+            # 以 CancelledError 结束，等待 result() 的会话线程随之退出
+            result.set_exception(CancelledError())
+        elif future.exception() is not None:
+            result.set_exception(future.exception())
+        else:
+            result.set_result(future.result())
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            # 尚未提交到进程池的任务直接取消
+            for pending in self._queues.values():
+                for result, _, _ in pending:
+                    result.cancel()
+                pending.clear()
+            self._cond.notify_all()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class WindowSession:
+    """
+    单个窗口的流水线。
+
+    参数:
+        hwnd: 窗口句柄
+        geometry_ttl: 棋盘区域缓存的有效期（秒），过期或截图失败时重新计算
+    """
+
+    def __init__(self, hwnd: int, geometry_ttl: float = 5.0):
+        self.hwnd = hwnd
+        self.geometry_ttl = geometry_ttl
+        self.frames = 0
+        self.moves = 0
+        self.latencies: deque[float] = deque(maxlen=200)  # 截图到最后一次点击完成（秒）
+        self.started_at = time.monotonic()
+        self.alive = True
+        self._region = None
+        self._origin = (0, 0)
+        self._region_at = 0.0
+        self.recognizer = recognize.DiffRecognizer()
+
+    def geometry(self):
+        """返回 (棋盘区域[客户区坐标], 客户区左上角屏幕坐标)，必要时刷新缓存"""
+        if self._region is None or time.monotonic() - self._region_at > self.geometry_ttl:
+            self._region = recognize.board_region(self.hwnd)
+            left, top, _, _ = recognize.get_resolution(self.hwnd)
+            self._origin = (left, top)
+            self._region_at = time.monotonic()
+        return self._region, self._origin
+
+    def invalidate(self) -> None:
+        self._region = None
+
+    def stats(self) -> dict:
+        elapsed = max(1e-9, time.monotonic() - self.started_at)
+        lat = sorted(self.latencies)
+        return {
+            'frames': self.frames,
+            'moves': self.moves,
+            'moves_per_sec': self.moves / elapsed,
+            'frames_per_sec': self.frames / elapsed,
+            'latency_ms': statistics.mean(lat) * 1000 if lat else 0.0,
+            'latency_p95_ms': lat[min(len(lat) - 1, math.ceil(len(lat) * 0.95) - 1)] * 1000 if lat else 0.0,  # 最近秩法
+        }
+
+
+class SessionManager:
+    """
+    参数:
+        title_keyword: 窗口标题关键字
+        workers: 共享求解进程数
+        max_moves: 每帧最多执行的移动数（eliminate.plan_moves）
+        simulations: 每个移动的模拟次数，None 时取 eliminate.SOLVER_SIMULATIONS 中求解器的默认值
+        solver: 求解器，'independent' 或 'crn'（eliminate.plan_moves）
+        idle: 没有可用移动时的等待时间（秒）
+    """
+
+    def __init__(self, title_keyword: str = TITLE_KEYWORD, workers: int = 4, max_moves: int = 3,
+                 simulations: int | None = None, solver: str = 'independent', idle: float = 0.1):
+        self.title_keyword = title_keyword
+        self.max_moves = max_moves
+        self.simulations = eliminate.SOLVER_SIMULATIONS[solver] if simulations is None else simulations
+        self.solver = solver
+        self.idle = idle
+        self.sessions: dict[int, WindowSession] = {}
+        self.scheduler = FairScheduler(workers)
+        self.clicker = input_backend.create_backend(timing=input_backend.load_timing(CLICK_TIMING_PATH))
+        self._click_lock = threading.Lock()  # 鼠标全局共享，点击需串行
+        self._running = threading.Event()  # 未设置时暂停，各窗口不截图、不点击
+        self._stop = threading.Event()
+
+    def on_press(self, key) -> None:
+        """键盘监听回调，按键与 main.py 相同"""
+        if key == keyboard.Key.space:
+            if not self._running.is_set():
+                self._running.set()
+                print("自动点击已启动 (Space)")
+        elif getattr(key, "char", None) and key.char.lower() in ("x", "c", "v", "b") or key == keyboard.Key.esc:
+            self.pause("自动点击已暂停 (X/C/V/B/ESC)")
+        elif key == keyboard.Key.f2:
+            print("自动点击已结束 (F2)")
+            self._running.clear()
+            self._stop.set()
+
+    def pause(self, message: str) -> None:
+        if self._running.is_set():
+            self._running.clear()
+            print(message)
+
+    def discover(self) -> None:
+        """查找新窗口并启动会话，已关闭的窗口停止会话"""
+        hwnds = set(recognize.find_hwnds(self.title_keyword))
+        for hwnd in hwnds - self.sessions.keys():
+            session = WindowSession(hwnd)
+            self.sessions[hwnd] = session
+            threading.Thread(target=self._run, args=(session,), name=f'session-{hwnd}', daemon=True).start()
+            print(f"发现窗口 {hwnd}")
+        for hwnd in self.sessions.keys() - hwnds:
+            self.sessions.pop(hwnd).alive = False
+            self.scheduler.remove(hwnd)
+            print(f"窗口 {hwnd} 已关闭")
+
+    def _run(self, session: WindowSession) -> None:
+        while session.alive and not self._stop.is_set():
+            if not self._running.wait(self.idle):
+                continue
+            start = time.perf_counter()
+            region, (ox, oy) = session.geometry()
+            if region is None:
+                session.invalidate()
+                time.sleep(self.idle)
+                continue
+            try:
+                img = recognize.capture_region(session.hwnd, region)
+            except Exception:
+                session.invalidate()
+                time.sleep(self.idle)
+                continue
+            mat, _ = session.recognizer.update(img)
+            session.frames += 1
+
+            try:
+                plan = self.scheduler.submit(session.hwnd, eliminate.plan_moves, mat, self.max_moves, self.simulations, 2, self.solver).result()
+            except CancelledError:
+                break  # 会话已移除
+            if not plan:
+                time.sleep(self.idle)
+                continue
+            left, top, right, _ = region
+            cell_size = (right - left) // 8
+            done = 0
+            with self._click_lock:
+                for ((r1, c1), (r2, c2)), _, _ in plan:
+                    # 求解期间可能已经暂停，每次交换前再确认
+                    if not self._running.is_set():
+                        break
+                    p1 = (ox + left + c1 * cell_size + cell_size // 2, oy + top + r1 * cell_size + cell_size // 2)
+                    p2 = (ox + left + c2 * cell_size + cell_size // 2, oy + top + r2 * cell_size + cell_size // 2)
+                    try:
+                        self.clicker.swap(p1, p2)
+                    except input_backend.FailSafeError as e:
+                        self.pause(f"⛔ {e}，全部窗口已暂停")
+                        break
+                    done += 1
+            session.moves += done
+            session.latencies.append(time.perf_counter() - start)
+
+    def report(self) -> None:
+        """打印每个窗口的吞吐与延迟"""
+        for hwnd, session in list(self.sessions.items()):
+            s = session.stats()
+            print(f"窗口 {hwnd}: 帧 {s['frames']} ({s['frames_per_sec']:.1f}/s)  移动 {s['moves']} ({s['moves_per_sec']:.1f}/s)"
+                  f"  延迟 平均 {s['latency_ms']:.0f}ms  p95 {s['latency_p95_ms']:.0f}ms")
+
+    def run(self, report_interval: float = 10.0, discover_interval: float = 5.0) -> None:
+        """运行直到按 F2 或 Ctrl+C"""
+        listener = keyboard.Listener(on_press=self.on_press, daemon=True)
+        listener.start()
+        print("按 Space 开始自动点击，X/C/V/B/ESC 暂停，F2 退出")
+        next_report = next_discover = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if now >= next_discover:
+                    self.discover()
+                    next_discover = now + discover_interval
+                if now >= next_report and self.sessions:
+                    self.report()
+                    next_report = now + report_interval
+                time.sleep(0.2)
+        except KeyboardInterrupt:
+            print("\n 程序已退出")
+        finally:
+            self._stop.set()
+            listener.stop()
+            self.scheduler.shutdown()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="同时驱动多个游戏窗口")
+    parser.add_argument('--title', default=TITLE_KEYWORD, help="窗口标题关键字")
+    parser.add_argument('--workers', type=int, default=4, help="共享求解进程数")
+    parser.add_argument('--max-moves', type=int, default=3, help="每帧最多执行的移动数")
+    parser.add_argument('--simulations', type=int, default=None, help="每个移动的模拟次数，默认按求解器取 1（independent）或 4（crn）")
+    parser.add_argument('--solver', choices=sorted(eliminate.SOLVER_SIMULATIONS), default='independent', help="求解器")
+    parser.add_argument('--report-interval', type=float, default=10.0, help="统计输出间隔（秒）")
+    args = parser.parse_args(argv)
+
+    manager = SessionManager(args.title, args.workers, args.max_moves, args.simulations, args.solver)
+    manager.run(args.report_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""
+无界面三消游戏模拟器
+与 eliminate.simulate_swap / simulate_fall 规则一致（横竖 3 连消除、下落、顶部随机补 1-6），
+所有操作都在 (N, 8, 8) 数组上向量化完成，可以同时推进成千上万局游戏，
+用于离线评估策略与评分权重，而不必连接真实游戏。
+
+用法示例:
+    python simulator.py --games 2000 --moves 50 --policy greedy
+    python simulator.py --games 100 --moves 30 --policy best --simulations 1
+"""
+import argparse
+import time
+from typing import Callable
+
+import numpy as np
+
+import eliminate
+
+ROWS, COLS = 8, 8
+NUM_COLORS = 6
+
+# 全部 112 种相邻交换，顺序与 eliminate.find_best_move 的遍历顺序一致（先向右再向下）
+MOVES = list(eliminate.adjacent_moves(ROWS, COLS))
+MOVE_INDEX = {move: idx for idx, move in enumerate(MOVES)}
+_MOVE_ARRAY = np.array([[r1, c1, r2, c2] for (r1, c1), (r2, c2) in MOVES])
+# 位棋盘：第 r*8+c 位表示 (r, c)，每种颜色一个 uint64
+_BIT_WEIGHTS = np.left_shift(np.uint64(1), np.arange(ROWS * COLS, dtype=np.uint64))
+_MOVE_P = (_MOVE_ARRAY[:, 0] * COLS + _MOVE_ARRAY[:, 1]).astype(np.uint64)
+_MOVE_Q = (_MOVE_ARRAY[:, 2] * COLS + _MOVE_ARRAY[:, 3]).astype(np.uint64)
+_MOVE_P_INT = _MOVE_P.astype(np.intp)
+_MOVE_Q_INT = _MOVE_Q.astype(np.intp)
+_CHUNK = 512  # first_round_counts 每块的棋盘数
+# 横向 3 连起点只能在第 0-5 列
+_H_START = np.bitwise_or.reduce(_BIT_WEIGHTS.reshape(ROWS, COLS)[:, :COLS - 2], axis=None)
+
+
+# ------------------- 1. 向量化规则 -------------------
+def match_mask(boards: np.ndarray) -> np.ndarray:
+    """
+    标记横竖方向连续 3 个及以上相同的非空方块。
+
+    参数:
+        boards: (..., 8, 8) 棋盘数组，0 代表已空
+    返回:
+        与 boards 同形状的 bool 数组，True 表示该格会被消除
+    """
+    nz = boards != 0
+    h = nz[..., :, :-2] & (boards[..., :, :-2] == boards[..., :, 1:-1]) & (boards[..., :, 1:-1] == boards[..., :, 2:])
+    v = nz[..., :-2, :] & (boards[..., :-2, :] == boards[..., 1:-1, :]) & (boards[..., 1:-1, :] == boards[..., 2:, :])
+    mask = np.zeros(boards.shape, dtype=bool)
+    mask[..., :, :-2] |= h
+    mask[..., :, 1:-1] |= h
+    mask[..., :, 2:] |= h
+    mask[..., :-2, :] |= v
+    mask[..., 1:-1, :] |= v
+    mask[..., 2:, :] |= v
+    return mask
+
+
+def apply_gravity(boards: np.ndarray) -> np.ndarray:
+    """让每列的非空方块落到底部并保持相对顺序，空位（0）留在顶部，返回新数组"""
+    order = np.argsort(boards != 0, axis=-2, kind='stable')
+    return np.take_along_axis(boards, order, axis=-2)
+
+
+def refill(boards: np.ndarray, rng: np.random.Generator) -> None:
+    """在空位（0）上原地生成新的随机方块（1-6）"""
+    empty = boards == 0
+    boards[empty] = rng.integers(1, NUM_COLORS + 1, size=int(empty.sum()))
+
+
+def swap(boards: np.ndarray, moves: np.ndarray) -> None:
+    """
+    对每个棋盘原地执行一次交换。
+
+    参数:
+        boards: (N, 8, 8) 棋盘数组
+        moves: (N,) MOVES 中的移动编号，-1 表示不交换
+    """
+    sel = np.flatnonzero(moves >= 0)
+    if sel.size == 0:
+        return
+    r1, c1, r2, c2 = _MOVE_ARRAY[moves[sel]].T
+    a = boards[sel, r1, c1].copy()
+    boards[sel, r1, c1] = boards[sel, r2, c2]
+    boards[sel, r2, c2] = a
+
+
+def resolve(boards: np.ndarray, rng: np.random.Generator | None) -> tuple[np.ndarray, np.ndarray]:
+    """
+    原地结算所有棋盘的连锁：消除 → 下落 → 补充，直到无可消除方块。
+    rng 为 None 时不补充，空位保持为 0，只结算确定的部分（与 eliminate.predict_swap 一致）。
+
+    返回:
+        (每个棋盘的总消除数, 每个棋盘的连锁轮数)
+    """
+    n = boards.shape[0]
+    eliminated = np.zeros(n, dtype=int)
+    chains = np.zeros(n, dtype=int)
+    # 每一轮只处理上一轮仍有消除的棋盘，大多数棋盘一两轮后就不再参与计算
+    active = np.arange(n)
+    sub = boards
+    while active.size:
+        mask = match_mask(sub)
+        counts = mask.sum(axis=(1, 2))
+        hit = counts > 0
+        if not hit.all():
+            active, sub, mask, counts = active[hit], sub[hit], mask[hit], counts[hit]
+            if not active.size:
+                break
+        eliminated[active] += counts
+        chains[active] += 1
+        sub[mask] = 0
+        sub = apply_gravity(sub)
+        if rng is not None:
+            refill(sub, rng)
+        boards[active] = sub
+    return eliminated, chains
+
+
+def to_bitboards(boards: np.ndarray) -> np.ndarray:
+    """把 (N, 8, 8) 棋盘转换为 (6, N) 的每色位棋盘"""
+    flat = boards.reshape(boards.shape[0], ROWS * COLS)
+    colors = np.arange(1, NUM_COLORS + 1).reshape(-1, 1, 1)
+    # 每 8 格打包成 1 字节（低位在前），8 字节按小端解释即为 uint64
+    packed = np.packbits(flat[None] == colors, axis=-1, bitorder='little')
+    return np.ascontiguousarray(packed).view('<u8')[..., 0].astype(np.uint64)
+
+
+def match_bits(bb: np.ndarray) -> np.ndarray:
+    """位棋盘版 match_mask：返回会被消除的格子位集合"""
+    one, two, eight, sixteen = np.uint64(1), np.uint64(2), np.uint64(8), np.uint64(16)
+    # 原地运算，减少大数组的临时分配
+    h = bb >> one
+    h &= bb
+    h &= bb >> two
+    h &= _H_START
+    v = bb >> eight
+    v &= bb
+    v &= bb >> sixteen
+    out = h << one
+    out |= h
+    out |= h << two
+    out |= v
+    out |= v << eight
+    out |= v << sixteen
+    return out
+
+
+def valid_moves(boards: np.ndarray) -> np.ndarray:
+    """返回 (N, 112) bool 数组，True 表示该交换能立即产生消除"""
+    return first_round_counts(boards) > 0
+
+
+def first_round_counts(boards: np.ndarray) -> np.ndarray:
+    """返回 (N, 112) 数组：每个交换在第一轮（补充之前，结果确定）消除的方块数"""
+    out = np.empty((boards.shape[0], len(MOVES)), dtype=int)
+    # 分块计算，中间数组保持在缓存大小以内；整批一次算时大批量反而更慢
+    for start in range(0, boards.shape[0], _CHUNK):
+        out[start:start + _CHUNK] = _first_round_counts(boards[start:start + _CHUNK])
+    return out
+
+
+def _first_round_counts(boards: np.ndarray) -> np.ndarray:
+    n = boards.shape[0]
+    # 第 0 列为空格（颜色 0）的位棋盘，恒为 0，使颜色编号可以直接作为下标
+    bb = np.zeros((n, NUM_COLORS + 1), dtype=np.uint64)  # (N, 7)
+    bb[:, 1:] = to_bitboards(boards).T
+    base = np.bitwise_count(match_bits(bb)).astype(np.int16)  # (N, 7) 交换前各颜色的消除数
+    flat = boards.reshape(n, ROWS * COLS).astype(np.intp)
+    cp = flat[:, _MOVE_P_INT]  # (N, 112) 交换两端的颜色
+    cq = flat[:, _MOVE_Q_INT]
+    # 一次交换只改变两端两种颜色的位棋盘，只对这两种颜色重新计算
+    total = base.sum(axis=1, dtype=int)[:, None] - np.take_along_axis(base, cp, 1) - np.take_along_axis(base, cq, 1)
+    for color in (cp, cq):
+        b = np.take_along_axis(bb, color, 1)  # (N, 112)
+        # 交换第 p、q 位：两位不同时同时翻转
+        diff = (b >> _MOVE_P) ^ (b >> _MOVE_Q)
+        diff &= np.uint64(1)
+        b ^= (diff << _MOVE_P) | (diff << _MOVE_Q)
+        total += np.bitwise_count(match_bits(b))
+    # 两端同色时交换不改变棋盘，上式恰好还原为 base 之和
+    return total
+
+
+def random_boards(n: int, rng: np.random.Generator) -> np.ndarray:
+    """生成 n 个没有现成消除、且至少有一个可用移动的随机初始棋盘"""
+    boards = rng.integers(1, NUM_COLORS + 1, size=(n, ROWS, COLS)).astype(np.int8)
+    while True:
+        # 反复重抽参与消除的方块，直到没有现成的 3 连
+        mask = match_mask(boards)
+        while mask.any():
+            boards[mask] = rng.integers(1, NUM_COLORS + 1, size=int(mask.sum()))
+            mask = match_mask(boards)
+        dead = ~valid_moves(boards).any(axis=1)
+        if not dead.any():
+            return boards
+        boards[dead] = rng.integers(1, NUM_COLORS + 1, size=(int(dead.sum()), ROWS, COLS))
+
+
+# ------------------- 2. 批量游戏环境 -------------------
+class BatchGame:
+    """
+    同时推进 N 局游戏的环境。
+
+    评分与 eliminate.find_best_move 一致: 得分 = 消除数 + 连锁轮数 * 10。
+    无效交换（不产生消除）在真实游戏中会被弹回，这里同样不改变棋盘，但消耗一步。
+    棋盘无可用移动（死局）或步数用尽时该局结束。
+    """
+
+    def __init__(self, n: int, max_moves: int = 50, seed: int | None = None):
+        self.n = n
+        self.max_moves = max_moves
+        self.rng = np.random.default_rng(seed)
+        self.reset()
+
+    def reset(self) -> np.ndarray:
+        """重新生成全部棋盘并清空统计，返回 (N, 8, 8) 棋盘"""
+        self.boards = random_boards(self.n, self.rng)
+        self.move_counts = first_round_counts(self.boards)
+        self.scores = np.zeros(self.n, dtype=int)
+        self.eliminated = np.zeros(self.n, dtype=int)
+        self.chains = np.zeros(self.n, dtype=int)
+        self.max_chain = np.zeros(self.n, dtype=int)
+        self.moves_made = np.zeros(self.n, dtype=int)
+        self.invalid_moves = np.zeros(self.n, dtype=int)
+        self.dead = np.zeros(self.n, dtype=bool)
+        self.done = np.zeros(self.n, dtype=bool)
+        return self.boards
+
+    def step(self, moves: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        对所有未结束的棋盘执行一步。
+
+        参数:
+            moves: (N,) MOVES 中的移动编号，-1 表示无可走（视为死局）
+        返回:
+            (本步消除数, 本步连锁轮数, 是否已结束)
+        """
+        moves = np.where(self.done, -1, np.asarray(moves, dtype=int))
+        before = self.boards.copy()
+        swap(self.boards, moves)
+        eliminated, chains = resolve(self.boards, self.rng)
+
+        # 无效交换：弹回原棋盘
+        invalid = (moves >= 0) & (chains == 0)
+        self.boards[invalid] = before[invalid]
+
+        played = moves >= 0
+        self.moves_made += played
+        self.invalid_moves += invalid
+        self.eliminated += eliminated
+        self.chains += chains
+        self.max_chain = np.maximum(self.max_chain, chains)
+        self.scores += eliminated + chains * 10
+
+        self.move_counts = first_round_counts(self.boards)
+        self.dead |= ~self.done & (self.move_counts.max(axis=1) == 0)
+        self.done |= self.dead | (self.moves_made >= self.max_moves) | ~played
+        return eliminated, chains, self.done.copy()
+
+    def run(self, policy: Callable[[np.ndarray, np.ndarray], np.ndarray]) -> None:
+        """
+        用策略把所有棋盘推进到结束。
+
+        policy(boards, move_counts) 接收未结束的 (n, 8, 8) 棋盘及其 (n, 112) 第一轮消除数，
+        返回 (n,) 移动编号。
+        """
+        while not self.done.all():
+            moves = np.full(self.n, -1, dtype=int)
+            active = np.flatnonzero(~self.done)
+            moves[active] = policy(self.boards[active], self.move_counts[active])
+            self.step(moves)
+
+
+# ------------------- 3. 策略 -------------------
+def greedy_policy(boards: np.ndarray, counts: np.ndarray | None = None) -> np.ndarray:
+    """向量化贪心策略：选择第一轮消除数最多的交换，无可用移动时返回 -1"""
+    if counts is None:
+        counts = first_round_counts(boards)
+    best = counts.argmax(axis=1)
+    return np.where(counts.max(axis=1) > 0, best, -1)
+
+
+def solver_policy(solver: Callable | None = None, **kwargs) -> Callable[[np.ndarray, np.ndarray], np.ndarray]:
+    """
+    把逐棋盘求解函数（默认 eliminate.find_best_move）包装成批量策略。
+
+    solver(matrix, **kwargs) 的返回值需以 (best_move, best_elim, best_chain, ...) 开头。
+    """
+    if solver is None:
+        solver = eliminate.find_best_move
+
+    def policy(boards: np.ndarray, counts: np.ndarray) -> np.ndarray:
+        moves = np.full(len(boards), -1, dtype=int)
+        for k, board in enumerate(boards):
+            if not counts[k].any():
+                continue
+            best_move, _, best_chain, *_ = solver(board.astype(int), **kwargs)
+            if best_chain > 0:
+                moves[k] = MOVE_INDEX[best_move]
+        return moves
+
+    return policy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面三消模拟器：批量评估策略")
+    parser.add_argument('--games', type=int, default=1000, help="同时进行的对局数")
+    parser.add_argument('--moves', type=int, default=50, help="每局最大步数")
+    parser.add_argument('--policy', choices=('greedy', 'best', 'crn'), default='greedy',
+                        help="greedy=向量化贪心，best=eliminate.find_best_move，crn=eliminate.find_best_move_crn")
+    parser.add_argument('--simulations', type=int, default=1, help="best 策略每个移动的模拟次数 / crn 策略最多模拟轮数")
+    parser.add_argument('--prune', type=int, default=None, help="best 策略只完整模拟静态评估前 N 个移动")
+    parser.add_argument('--weights', help="剪枝使用的静态评估权重 .npy（evaluator.py --out），默认 evaluator.DEFAULT_WEIGHTS")
+    parser.add_argument('--seed', type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+    if args.weights and (args.policy != 'best' or args.prune is None):
+        parser.error("--weights 只用于 best 策略的 --prune 剪枝")
+
+    if args.policy == 'greedy':
+        policy = greedy_policy
+    elif args.policy == 'best':
+        weights = None
+        if args.weights:
+            import evaluator  # evaluator 导入本模块，不能在模块顶部导入
+            weights = evaluator.load_weights(args.weights)
+        policy = solver_policy(simulations=args.simulations, prune=args.prune, weights=weights)
+    else:
+        policy = solver_policy(eliminate.find_best_move_crn, max_simulations=args.simulations, min_simulations=min(8, args.simulations))
+    game = BatchGame(args.games, args.moves, args.seed)
+    start = time.perf_counter()
+    game.run(policy)
+    elapsed = time.perf_counter() - start
+
+    print(f"对局数: {args.games}  策略: {args.policy}  用时: {elapsed:.2f}s  ({args.games / elapsed:.0f} 局/秒)")
+    print(f"平均得分: {game.scores.mean():.1f}  平均消除: {game.eliminated.mean():.1f}  平均连锁: {game.chains.mean():.1f}")
+    print(f"平均步数: {game.moves_made.mean():.1f}  无效步: {game.invalid_moves.sum()}  死局: {game.dead.sum()}  最大单步连锁: {game.max_chain.max()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+推测式预求解
+执行移动后，棋盘在动画期间的确定部分（交换、消除、下落）已经可以预测，只有顶部新落下的方块未知。
+在后台线程中对预测棋盘的已知区域提前求解；下一帧识别完成后，若实际棋盘与预测的已知部分一致，
+直接复用预先算好的移动，省去一次完整求解。
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import numpy as np
+
+import eliminate
+
+
+def predict_board(matrix: np.ndarray, moves: list[tuple[tuple[int, int], tuple[int, int]]]) -> np.ndarray:
+    """
+    依次执行 moves 中的交换，只保留确定的部分。
+
+    参数:
+        matrix: 当前棋盘矩阵
+        moves: 按执行顺序排列的移动 [((r1, c1), (r2, c2)), ...]
+    返回:
+        预测棋盘，0 代表尚未知道的新方块
+    """
+    board = matrix.copy()
+    for (r1, c1), (r2, c2) in moves:
+        board = eliminate.predict_swap(board, r1, c1, r2, c2)[0]
+    return board
+
+
+class SpeculativeSolver:
+    """
+    在后台对预测棋盘提前执行 eliminate.plan_moves。
+
+    用法:
+        plan = speculator.lookup(mat)       # 命中则直接得到规划，未命中返回 None
+        if plan is None:
+            plan = eliminate.plan_moves(mat, ...)
+        speculator.submit(mat, [move for move, _, _ in plan])   # 点击之前提交，求解与点击、动画重叠
+        ...执行点击...（中途停止时调用 speculator.cancel()）
+    """
+
+    def __init__(self, max_moves: int = 3, simulations: int = 1, solver: str = 'independent',
+                 prune: int | None = None, weights: np.ndarray | None = None):
+        self.max_moves = max_moves
+        self.simulations = simulations
+        self.solver = solver
+        self.prune = prune
+        self.weights = weights
+        self.hits = 0
+        self.misses = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='speculate')
+        self._predicted: np.ndarray | None = None
+        self._future: Future | None = None
+
+    def submit(self, matrix: np.ndarray, moves: list[tuple[tuple[int, int], tuple[int, int]]]) -> None:
+        """记录即将执行的移动，预测下一帧棋盘并在后台开始求解"""
+        self.cancel()
+        self._predicted = predict_board(matrix, moves)
+        self._future = self._executor.submit(self._solve, self._predicted.copy())
+
+    def cancel(self) -> None:
+        """丢弃尚未使用的预测（移动没有全部执行时调用），正在运行的求解结果被忽略"""
+        if self._future is not None:
+            self._future.cancel()
+        self._predicted = self._future = None
+
+    def _solve(self, predicted: np.ndarray) -> list:
+        # 只保留两个交换位置都已知的移动，未知方块的真实颜色无法保证
+        plan = eliminate.plan_moves(predicted, self.max_moves, self.simulations, solver=self.solver,
+                                     prune=self.prune, weights=self.weights)
+        return [item for item in plan if predicted[item[0][0]] != 0 and predicted[item[0][1]] != 0]
+
+    def lookup(self, matrix: np.ndarray) -> list | None:
+        """
+        用实际识别的棋盘校验预测。
+
+        已知区域全部一致时返回预先规划的 [(move, elim, chain), ...]（必要时等待后台求解完成），
+        否则（连锁被新方块延续、识别到动画中间帧等）返回 None，由调用方重新求解。
+        """
+        predicted, future = self._predicted, self._future
+        self._predicted = self._future = None
+        if predicted is None or future is None:
+            return None
+        known = predicted != 0
+        if not np.array_equal(matrix[known], predicted[known]):
+            future.cancel()
+            self.misses += 1
+            return None
+        plan = future.result()
+        if not plan:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return plan
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
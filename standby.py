@@ -0,0 +1,103 @@
+"""
+待命求解
+后台线程持续截图识别，棋盘连续两帧不变（动画结束）后立即求解并保存结果，每个不同的棋盘对应一个帧代号。
+按 F3 时直接取出当前代号的结果执行，只需确认棋盘没有变化，不必在键盘线程里重新求解。
+"""
+import threading
+import time
+from typing import Callable, NamedTuple
+
+import numpy as np
+
+
+class Standby(NamedTuple):
+    generation: int  # 求解时的帧代号
+    board: np.ndarray  # 求解时的棋盘
+    location: tuple[int, int, int, int]  # 棋盘屏幕坐标 (left, top, right, bottom)
+    move: tuple[tuple[int, int], tuple[int, int]]
+    elim: int
+    chain: int
+    total_moves: int
+
+
+class StandbySolver:
+    """
+    参数:
+        capture: 返回 (8×8 棋盘, 棋盘屏幕坐标)，找不到窗口时返回 None
+        solve: 求解函数，返回 (best_move, best_elim, best_chain, total_moves)，与 eliminate.find_best_move 一致
+        active: 返回 False 时暂停观察（例如自动点击运行期间）
+        interval: 两次截图之间的间隔（秒）
+        max_age: 结果有效期（秒），超过后视为过期
+    """
+
+    def __init__(self, capture: Callable[[], tuple[np.ndarray, tuple[int, int, int, int]] | None],
+                 solve: Callable, active: Callable[[], bool] = lambda: True,
+                 interval: float = 0.1, max_age: float = 1.0):
+        self.capture = capture
+        self.solve = solve
+        self.active = active
+        self.interval = interval
+        self.max_age = max_age
+        self.generation = 0
+        self._board: np.ndarray | None = None
+        self._seen_at = 0.0
+        self._standby: Standby | None = None
+        self._taken = -1  # 结果已被取走（或无可用移动）的帧代号，同一棋盘不再重复求解
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='standby-solver', daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        stable = False
+        while not self._stop.wait(self.interval):
+            if not self.active():
+                continue
+            frame = self.capture()
+            if frame is None:
+                continue
+            board, location = frame
+            with self._lock:
+                if self._board is None or not np.array_equal(board, self._board):
+                    # 棋盘变化：新的帧代号，旧结果作废，等下一帧确认已静止
+                    self.generation += 1
+                    self._board = board
+                    self._standby = None
+                    stable = False
+                else:
+                    stable = True
+                self._seen_at = time.monotonic()
+                generation = self.generation
+                need_solve = stable and self._standby is None and generation != self._taken
+            if not need_solve:
+                continue
+            best_move, best_elim, best_chain, total_moves = self.solve(board)
+            with self._lock:
+                if generation != self.generation:
+                    continue
+                if best_chain <= 0:
+                    self._taken = generation
+                else:
+                    self._standby = Standby(generation, board, location, best_move, best_elim, best_chain, total_moves)
+
+    def take(self) -> Standby | None:
+        """
+        取出当前棋盘的待命结果，取出后即失效，避免同一结果在棋盘变化前被执行两次。
+        结果不属于最新帧代号或已过期时返回 None。
+        """
+        with self._lock:
+            standby = self._standby
+            if standby is None or standby.generation != self.generation:
+                return None
+            if time.monotonic() - self._seen_at > self.max_age:
+                return None
+            self._standby = None
+            self._taken = standby.generation
+            return standby
@@ -0,0 +1,71 @@
+"""
+input_backend 的时序测试，不产生真实输入（RecordingBackend），可在任意平台运行:
+    python -m pytest test_input_backend.py
+"""
+import json
+
+import pytest
+
+import input_backend
+
+# time.sleep 与线程调度带来的误差上限，只用于检查间隔没有被明显拉长
+TOLERANCE = 0.015
+# 截止时间从调用 click 之前开始计算，事件时间戳在调用之后，记录的间隔可能略短于目标
+EARLY = 0.001
+
+
+def make_backend(click_gap: float, move_gap: float, latency: float = 0.0) -> input_backend.RecordingBackend:
+    return input_backend.RecordingBackend(input_backend.ClickTiming(click_gap, move_gap, oversleep=0.0), latency)
+
+
+def test_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        input_backend.InputBackend()
+
+    class ClickOnly(input_backend.InputBackend):
+        def click(self, x, y):
+            pass
+
+    with pytest.raises(TypeError):
+        ClickOnly()
+
+
+def test_swap_clicks_in_order():
+    backend = make_backend(0.0, 0.0)
+    backend.swap((10, 20), (30, 40))
+    backend.swap((50, 60), (70, 80))
+    assert [(kind, x, y) for _, kind, x, y in backend.events] == [
+        ('click', 10, 20), ('click', 30, 40), ('click', 50, 60), ('click', 70, 80),
+    ]
+
+
+@pytest.mark.parametrize('latency', [0.0, 0.01])
+def test_swap_gaps(latency):
+    # 后端调用耗时计入间隔，而不是叠加在间隔之外
+    click_gap, move_gap = 0.03, 0.05
+    backend = make_backend(click_gap, move_gap, latency)
+    for _ in range(3):
+        backend.swap((0, 0), (1, 1))
+    times = [t for t, _, _ in backend.clicks()]
+    assert len(times) == 6
+    for k in range(0, 6, 2):
+        assert click_gap - EARLY <= times[k + 1] - times[k] < click_gap + TOLERANCE
+    for k in range(1, 5, 2):
+        assert move_gap - EARLY <= times[k + 1] - times[k] < move_gap + TOLERANCE
+
+
+def test_move_to_is_recorded_but_not_a_click():
+    backend = make_backend(0.0, 0.0)
+    backend.move_to(5, 6)
+    assert [(kind, x, y) for _, kind, x, y in backend.events] == [('move', 5, 6)]
+    assert backend.clicks() == []
+
+
+def test_load_timing(tmp_path):
+    missing = input_backend.load_timing(str(tmp_path / 'missing.json'), click_gap=0.04, move_gap=0.06)
+    assert (missing.click_gap, missing.move_gap) == (0.04, 0.06)
+
+    path = tmp_path / 'click_timing.json'
+    path.write_text(json.dumps({'click_gap': 0.015, 'move_gap': 0.0}), encoding='utf-8')
+    measured = input_backend.load_timing(str(path))
+    assert (measured.click_gap, measured.move_gap) == (0.015, 0.0)